@@ -0,0 +1,177 @@
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+# =============================
+# Artifact Secondary Indexes
+# =============================
+# The Artefacts Manager filters by section and MIME type and sorts by upload
+# time or name. Scanning st.session_state.artifacts for every rerun grows with
+# the number of uploads, so these indexes are maintained incrementally in
+# add_artifact and a page of results is sliced straight out of them.
+#
+# Like SearchIndex, an index can be layered over a shared, read-only base
+# (the persisted artifacts), so a session only indexes its own uploads. The
+# indexed fields never change after an upload, so layers hold disjoint ids
+# and a page is merged from each layer's sorted postings.
+
+SORT_OPTIONS = {
+    "newest": "Newest first",
+    "oldest": "Oldest first",
+    "name": "Name (A–Z)",
+}
+
+
+class ArtifactIndex:
+    """Secondary indexes on section, MIME type, created_at and name."""
+
+    def __init__(self, base: Optional["ArtifactIndex"] = None):
+        self.base = base
+        # Each posting list is kept sorted by (created_at, artifact_id)
+        self.by_created: List[Tuple[str, str]] = []
+        self.by_section: Dict[str, List[Tuple[str, str]]] = {}
+        self.by_mime: Dict[str, List[Tuple[str, str]]] = {}
+        self.by_name: List[Tuple[str, str]] = []
+        self._name_keys: Dict[str, str] = {}
+        self._section_ids: Dict[str, Set[str]] = {}
+        self._mime_ids: Dict[str, Set[str]] = {}
+
+    @classmethod
+    def build(cls, artifacts: Dict[str, dict]) -> "ArtifactIndex":
+        index = cls()
+        for artifact_id, meta in artifacts.items():
+            index.add(artifact_id, meta)
+        return index
+
+    def merged_with_base(self) -> "ArtifactIndex":
+        """Return one layer holding this layer and its base; neither is modified."""
+        lower = self.base
+        index = ArtifactIndex(lower.base)
+        index.by_created = list(heapq.merge(lower.by_created, self.by_created))
+        for attr in ("by_section", "by_mime"):
+            merged = getattr(index, attr)
+            for key in getattr(lower, attr).keys() | getattr(self, attr).keys():
+                merged[key] = list(heapq.merge(getattr(lower, attr).get(key, []), getattr(self, attr).get(key, [])))
+        index.by_name = list(heapq.merge(lower.by_name, self.by_name))
+        index._name_keys = {**lower._name_keys, **self._name_keys}
+        for attr in ("_section_ids", "_mime_ids"):
+            merged = getattr(index, attr)
+            for key in getattr(lower, attr).keys() | getattr(self, attr).keys():
+                merged[key] = getattr(lower, attr).get(key, set()) | getattr(self, attr).get(key, set())
+        return index
+
+    def _layers(self) -> Iterator["ArtifactIndex"]:
+        layer = self
+        while layer is not None:
+            yield layer
+            layer = layer.base
+
+    def __len__(self) -> int:
+        return sum(len(layer.by_created) for layer in self._layers())
+
+    def __contains__(self, artifact_id: str) -> bool:
+        return any(artifact_id in layer._name_keys for layer in self._layers())
+
+    def add(self, artifact_id: str, meta: dict):
+        created = (meta["created_at"], artifact_id)
+        _insert(self.by_created, created)
+        _insert(self.by_section.setdefault(meta["section_key"], []), created)
+        _insert(self.by_mime.setdefault(meta["mime"], []), created)
+        insort(self.by_name, (meta["name"].lower(), artifact_id))
+        self._name_keys[artifact_id] = meta["name"].lower()
+        self._section_ids.setdefault(meta["section_key"], set()).add(artifact_id)
+        self._mime_ids.setdefault(meta["mime"], set()).add(artifact_id)
+
+    def remove(self, artifact_id: str, meta: dict):
+        """Remove an artifact added to this layer; its base is never modified."""
+        created = (meta["created_at"], artifact_id)
+        _delete(self.by_created, created)
+        _delete(self.by_section.get(meta["section_key"], []), created)
+        _delete(self.by_mime.get(meta["mime"], []), created)
+        _delete(self.by_name, (meta["name"].lower(), artifact_id))
+        self._name_keys.pop(artifact_id, None)
+        self._section_ids.get(meta["section_key"], set()).discard(artifact_id)
+        self._mime_ids.get(meta["mime"], set()).discard(artifact_id)
+
+    def section_counts(self) -> Dict[str, int]:
+        counts: Counter = Counter()
+        for layer in self._layers():
+            counts.update({k: len(v) for k, v in layer.by_section.items()})
+        return {k: n for k, n in counts.items() if n}
+
+    def mime_counts(self) -> Dict[str, int]:
+        counts: Counter = Counter()
+        for layer in self._layers():
+            counts.update({k: len(v) for k, v in layer.by_mime.items()})
+        return {k: n for k, n in counts.items() if n}
+
+    def query(
+        self,
+        section_key: Optional[str] = None,
+        mime: Optional[str] = None,
+        sort: str = "newest",
+        offset: int = 0,
+        limit: int = 25,
+    ) -> Tuple[int, List[str]]:
+        """Return (total matches, artifact ids for the requested page)."""
+        wanted = offset + limit
+        results = [layer._matches(section_key, mime, sort, wanted) for layer in self._layers()]
+        total = sum(count for count, _ in results)
+        if len(results) == 1:
+            page = results[0][1][offset:wanted]
+        else:
+            # Layers hold disjoint ids: merge their leading matches
+            merged = heapq.merge(*(entries for _, entries in results), reverse=sort == "newest")
+            page = list(islice(merged, offset, wanted))
+        return total, [artifact_id for _, artifact_id in page]
+
+    def _matches(
+        self, section_key: Optional[str], mime: Optional[str], sort: str, wanted: int
+    ) -> Tuple[int, List[Tuple[str, str]]]:
+        """Return (matches in this layer, its first `wanted` sort entries in page order)."""
+        filters: List[Set[str]] = []
+        postings = self.by_created
+        if section_key is not None:
+            postings = self.by_section.get(section_key, [])
+            filters.append(self._section_ids.get(section_key, set()))
+        if mime is not None:
+            mime_postings = self.by_mime.get(mime, [])
+            # Drive the scan from the smaller posting list
+            if section_key is None or len(mime_postings) < len(postings):
+                postings = mime_postings
+            filters.append(self._mime_ids.get(mime, set()))
+
+        if sort == "name":
+            if not filters:
+                return len(self.by_name), self.by_name[:wanted]
+            filters.sort(key=len)
+            matches = filters[0].intersection(*filters[1:])
+            if wanted * len(self.by_name) < len(matches) ** 2:
+                # Common filter: the page is found after a short walk of by_name
+                hits = ((name, i) for name, i in self.by_name if i in matches)
+                return len(matches), list(islice(hits, wanted))
+            # Selective filter: sort only the matches instead of every name
+            return len(matches), heapq.nsmallest(wanted, ((self._name_keys[i], i) for i in matches))
+
+        if len(filters) > 1:
+            postings = [p for p in postings if all(p[1] in f for f in filters)]
+        total = len(postings)
+        if sort == "oldest":
+            return total, postings[:wanted]
+        return total, postings[max(total - wanted, 0):][::-1]
+
+
+def _insert(postings: List[Tuple[str, str]], entry: Tuple[str, str]):
+    # Uploads arrive in time order, so appending is the common case
+    if not postings or postings[-1] <= entry:
+        postings.append(entry)
+    else:
+        insort(postings, entry)
+
+
+def _delete(postings: List[Tuple[str, str]], entry: Tuple[str, str]):
+    i = bisect_left(postings, entry)
+    if i < len(postings) and postings[i] == entry:
+        del postings[i]
@@ -0,0 +1,419 @@
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional, Tuple, Type
+
+from blob_codecs import CODECS, Codec, compress_file, configured_codec, is_compressible, open_compressed, read_raw_size
+from metrics import inc, observe, set_gauge
+
+# =============================
+# Content-Addressed Artifact Store
+# =============================
+# Uploaded artefacts are stored once per SHA-256 digest, independent of which
+# session uploaded them. Session state only keeps small metadata records that
+# point at a digest, so identical uploads share a single blob on disk and in
+# the in-memory hot cache. Compressible payloads are stored compressed (see
+# blob_codecs.py) and decompressed transparently by get()/open().
+#
+# Configuration (environment):
+#   RESUME_ARTIFACT_STORE      backend name from STORE_BACKENDS (default "local")
+#   RESUME_ARTIFACT_DIR        blob directory for the local backend (default .artifacts)
+#   RESUME_ARTIFACT_CACHE_MB   hot blob cache size in MiB (default 64)
+#   RESUME_SESSION_CACHE_MB    per-session share of the text and preview caches in MiB (default 16)
+#   RESUME_MAX_UPLOAD_MB       largest accepted upload in MiB (default 200)
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get("RESUME_MAX_UPLOAD_MB", "200")) * 1024 * 1024
+# Marker file recording that the upload scan flagged a blob
+QUARANTINE_SUFFIX = ".flagged"
+# Share of each in-memory cache a single session may hold
+SESSION_CACHE_BYTES = int(os.environ.get("RESUME_SESSION_CACHE_MB", "16")) * 1024 * 1024
+
+# Leading magic bytes -> MIME type, checked against the first chunk of an upload
+MAGIC_NUMBERS = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+    (b"\x28\xb5\x2f\xfd", "application/zstd"),
+]
+
+
+class ArtifactTooLarge(ValueError):
+    """Raised while ingesting an upload as soon as it exceeds the size limit."""
+
+    def __init__(self, limit: int):
+        super().__init__(f"Artifact exceeds the {limit // (1024 * 1024)} MB upload limit.")
+        self.limit = limit
+
+
+class IngestResult(NamedTuple):
+    digest: str
+    size: int
+    mime: str
+
+
+def sniff_mime(head: bytes) -> str:
+    """Guess a MIME type from the first bytes of a payload."""
+    for magic, mime in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp":
+        return "video/mp4"
+    stripped = head.lstrip()
+    if stripped[:5].lower() == b"<?xml" or stripped[:4].lower() == b"<svg":
+        return "image/svg+xml" if b"<svg" in stripped[:1024].lower() else "application/xml"
+    if stripped[:1] in (b"{", b"["):
+        return "application/json"
+    try:
+        # A multi-byte character may be split at the chunk boundary
+        head[:-4].decode("utf-8")
+    except UnicodeDecodeError:
+        return "application/octet-stream"
+    return "text/plain"
+
+
+class ArtifactStore:
+    """Interface for blob stores keyed by the SHA-256 hex digest of their content."""
+
+    def put(self, data: bytes) -> str:
+        """Store data (deduplicated) and return its digest."""
+        raise NotImplementedError
+
+    def ingest(
+        self,
+        stream: BinaryIO,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        chunk_size: int = CHUNK_SIZE,
+        mime: Optional[str] = None,
+    ) -> IngestResult:
+        """Store a file-like object in one streaming pass of fixed-size chunks.
+
+        Hashing, the size limit, MIME sniffing and the write to storage all
+        happen per chunk, so memory stays bounded by chunk_size. Raises
+        ArtifactTooLarge as soon as more than max_bytes have been read. mime,
+        when given, overrides the sniffed type for choosing a storage codec.
+        """
+        raise NotImplementedError
+
+    def get(self, digest: str) -> bytes:
+        """Return the full payload for digest. Raises KeyError if unknown."""
+        raise NotImplementedError
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open the payload for streaming reads. Raises KeyError if unknown."""
+        raise NotImplementedError
+
+    def exists(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def size(self, digest: str) -> int:
+        raise NotImplementedError
+
+    def quarantine(self, digest: str):
+        """Mark a blob as flagged by the upload scan; it is kept but never served."""
+        raise NotImplementedError
+
+    def is_quarantined(self, digest: str) -> bool:
+        raise NotImplementedError
+
+    def storage_info(self, digest: str) -> Tuple[int, str]:
+        """Return (bytes on storage, codec name) for digest. Raises KeyError if unknown."""
+        return self.size(digest), "identity"
+
+    def cached_bytes(self) -> int:
+        """Bytes currently held in memory by the store's hot cache."""
+        return 0
+
+
+class BlobCache:
+    """Thread-safe LRU of blobs bounded by total bytes rather than entry count.
+
+    With owner_max_bytes set, every entry is also charged to the owner (a
+    session) that last read or stored it, and an owner going over its share
+    loses its own least-recently-viewed entries first. Evicted blobs are only
+    dropped from memory; callers reload them from disk on the next miss.
+    """
+
+    def __init__(self, max_bytes: int, owner_max_bytes: Optional[int] = None, name: str = "blob"):
+        self.max_bytes = max_bytes
+        self.owner_max_bytes = owner_max_bytes
+        self.name = name
+        self.current_bytes = 0
+        self.evictions = 0
+        self._items: "OrderedDict[str, Tuple[bytes, Optional[str]]]" = OrderedDict()
+        # owner -> its keys in least-recently-viewed order
+        self._owned: Dict[str, "OrderedDict[str, None]"] = {}
+        self._owner_bytes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, owner: Optional[str] = None) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            self._charge(key, item[0], owner)
+            self._enforce(owner)
+            return item[0]
+
+    def put(self, key: str, value: bytes, owner: Optional[str] = None):
+        # Blobs larger than a quarter of the budget would just flush everything else
+        if len(value) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._charge(key, self._items[key][0], owner)
+            else:
+                self._items[key] = (value, None)
+                self.current_bytes += len(value)
+                self._charge(key, value, owner)
+            self._enforce(owner)
+        set_gauge("cache_bytes", self.current_bytes, cache=self.name)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def release(self, owner: str):
+        """Stop charging owner for its entries (its session ended); they stay cached for others."""
+        with self._lock:
+            for key in self._owned.pop(owner, ()):
+                self._items[key] = (self._items[key][0], None)
+            self._owner_bytes.pop(owner, None)
+
+    def owner_bytes(self, owner: str) -> int:
+        return self._owner_bytes.get(owner, 0)
+
+    def _charge(self, key: str, value: bytes, owner: Optional[str]):
+        previous = self._items[key][1]
+        if owner is None or owner == previous:
+            if previous is not None:
+                self._owned[previous].move_to_end(key)
+            return
+        if previous is not None:
+            self._uncharge(key, len(value), previous)
+        self._items[key] = (value, owner)
+        self._owned.setdefault(owner, OrderedDict())[key] = None
+        self._owner_bytes[owner] = self._owner_bytes.get(owner, 0) + len(value)
+
+    def _uncharge(self, key: str, size: int, owner: str):
+        owned = self._owned[owner]
+        del owned[key]
+        self._owner_bytes[owner] -= size
+        if not owned:
+            del self._owned[owner]
+            del self._owner_bytes[owner]
+
+    def _remove(self, key: str) -> bool:
+        item = self._items.pop(key, None)
+        if item is None:
+            return False
+        value, owner = item
+        self.current_bytes -= len(value)
+        if owner is not None:
+            self._uncharge(key, len(value), owner)
+        return True
+
+    def _enforce(self, owner: Optional[str]):
+        if owner is not None and self.owner_max_bytes is not None:
+            while self._owner_bytes.get(owner, 0) > self.owner_max_bytes:
+                self._remove(next(iter(self._owned[owner])))
+                self._evicted("session")
+        while self.current_bytes > self.max_bytes:
+            self._remove(next(iter(self._items)))
+            self._evicted("global")
+
+    def _evicted(self, reason: str):
+        self.evictions += 1
+        inc("cache_evictions", cache=self.name, reason=reason)
+
+
+class LocalArtifactStore(ArtifactStore):
+    """Blobs stored as <root>/<digest[:2]>/<digest>[.zz|.zst] and read back via mmap or a decompressor."""
+
+    def __init__(
+        self,
+        root: str,
+        cache_bytes: int = 64 * 1024 * 1024,
+        codec: Optional[Codec] = None,
+    ):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        # Sessions never read payloads into memory (pages stream them through the
+        # asset server), so this cache has no per-session share
+        self.cache = BlobCache(cache_bytes, name="artifact")
+        # Compressible payloads are stored as <digest><codec suffix>
+        self.codec = codec
+
+    def path_for(self, digest: str) -> str:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise KeyError(digest)
+        return os.path.join(self.root, digest[:2], digest)
+
+    def _locate(self, digest: str) -> Tuple[str, Optional[Codec]]:
+        """Return the blob path and the codec it is stored with. Raises KeyError if unknown."""
+        path = self.path_for(digest)
+        if os.path.exists(path):
+            return path, None
+        for codec in CODECS.values():
+            if os.path.exists(path + codec.suffix):
+                return path + codec.suffix, codec
+        raise KeyError(digest)
+
+    def put(self, data: bytes) -> str:
+        digest = self.ingest(io.BytesIO(data), max_bytes=len(data)).digest
+        self.cache.put(digest, data)
+        return digest
+
+    def ingest(
+        self,
+        stream: BinaryIO,
+        max_bytes: int = MAX_UPLOAD_BYTES,
+        chunk_size: int = CHUNK_SIZE,
+        mime: Optional[str] = None,
+    ) -> IngestResult:
+        hasher = hashlib.sha256()
+        size = 0
+        sniffed = None
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        compressed_path = None
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(chunk_size), b""):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ArtifactTooLarge(max_bytes)
+                    if sniffed is None:
+                        sniffed = sniff_mime(chunk)
+                    hasher.update(chunk)
+                    f.write(chunk)
+            sniffed = sniffed or "application/octet-stream"
+            digest = hasher.hexdigest()
+            path = self.path_for(digest)
+            if self.exists(digest):
+                os.unlink(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                codec = self.codec if self.codec is not None and is_compressible(mime or sniffed) else None
+                if codec is not None:
+                    compressed_path = tmp_path + codec.suffix
+                    if compress_file(tmp_path, compressed_path, size, codec) is not None:
+                        os.replace(compressed_path, path + codec.suffix)
+                        os.unlink(tmp_path)
+                        return IngestResult(digest, size, sniffed)
+                os.replace(tmp_path, path)
+        except BaseException:
+            for leftover in (tmp_path, compressed_path):
+                if leftover and os.path.exists(leftover):
+                    os.unlink(leftover)
+            raise
+        return IngestResult(digest, size, sniffed)
+
+    @contextmanager
+    def view(self, digest: str) -> Iterator[memoryview]:
+        """Yield a read-only view of the blob: zero-copy mmap unless stored compressed."""
+        path, codec = self._locate(digest)
+        if codec is not None:
+            yield memoryview(self.get(digest))
+            return
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        with f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def get(self, digest: str) -> bytes:
+        data = self.cache.get(digest)
+        if data is None:
+            # Never loaded, or evicted by a budget: reload from disk
+            started = time.perf_counter()
+            path, codec = self._locate(digest)
+            if codec is not None:
+                with open_compressed(path, codec) as stream:
+                    data = stream.read()
+            else:
+                with self.view(digest) as view:
+                    data = view.tobytes()
+            observe("cache_reload", time.perf_counter() - started, cache=self.cache.name)
+            self.cache.put(digest, data)
+        return data
+
+    def open(self, digest: str) -> BinaryIO:
+        path, codec = self._locate(digest)
+        try:
+            return open_compressed(path, codec) if codec is not None else open(path, "rb")
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def exists(self, digest: str) -> bool:
+        try:
+            self._locate(digest)
+        except KeyError:
+            return False
+        return True
+
+    def size(self, digest: str) -> int:
+        path, codec = self._locate(digest)
+        try:
+            return read_raw_size(path) if codec is not None else os.path.getsize(path)
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+
+    def quarantine(self, digest: str):
+        # An empty marker next to the blob, visible to every process sharing the store
+        open(self.path_for(digest) + QUARANTINE_SUFFIX, "ab").close()
+
+    def is_quarantined(self, digest: str) -> bool:
+        return os.path.exists(self.path_for(digest) + QUARANTINE_SUFFIX)
+
+    def storage_info(self, digest: str) -> Tuple[int, str]:
+        path, codec = self._locate(digest)
+        return os.path.getsize(path), codec.name if codec is not None else "identity"
+
+    def cached_bytes(self) -> int:
+        return self.cache.current_bytes
+
+
+STORE_BACKENDS: Dict[str, Type[ArtifactStore]] = {
+    "local": LocalArtifactStore,
+}
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Return the process-wide artifact store configured from the environment."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = STORE_BACKENDS[os.environ.get("RESUME_ARTIFACT_STORE", "local")]
+                _store = backend(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"),
+                    cache_bytes=int(os.environ.get("RESUME_ARTIFACT_CACHE_MB", "64")) * 1024 * 1024,
+                    codec=configured_codec(),
+                )
+    return _store
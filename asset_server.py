@@ -0,0 +1,403 @@
+import email.utils
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import BinaryIO, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, quote, unquote, urlencode, urlsplit
+
+# =============================
+# Cacheable Static Asset Server
+# =============================
+# Streamlit reruns the whole script per interaction, so anything inlined into
+# the page (base64 data URIs, st.markdown payloads) is re-sent on every
+# navigation. Large static assets are instead served from this small HTTP
+# server, which runs once per process next to Streamlit and answers with
+# strong ETags, Cache-Control and 304s for conditional GETs. Uploaded artifacts
+# are downloadable from /artifacts/<sha256> (unless the upload scan flagged
+# them), streamed from the artifact store in fixed-size chunks, and
+# responsive image variants are served from
+# /variants/<key>/<width>.<format>; pages of registered PDFs are rasterized on
+# demand under /pdf-pages/<etag>/<page>/<scale>.jpg, and export bundles are
+# downloadable from /exports/<hash>.<zip|pdf>. All of them support single byte Range
+# requests (206/416) so downloads can resume. When metrics are enabled it
+# also serves the Prometheus snapshot at /metrics.
+#
+# Only the deployment knows the URL browsers reach this server at, so it is
+# started only when RESUME_ASSET_BASE_URL is set; without it (or when the port
+# cannot be bound) pages fall back to inline images, inline PDFs and
+# st.download_button (see assets.get_asset_server).
+#
+# Configuration (environment):
+#   RESUME_ASSET_BASE_URL  URL browsers use to reach it (required to enable it)
+#   RESUME_ASSET_HOST      interface to bind            (default 127.0.0.1)
+#   RESUME_ASSET_PORT      port to bind, 0 for any free (default 8502)
+
+CHUNK_SIZE = 64 * 1024
+# Versioned URLs (?v=<etag>) never change content, so browsers may keep them.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Unversioned URLs are revalidated with the ETag after a short while.
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+# Sentinel for a Range header that cannot be satisfied (answered with 416)
+UNSATISFIABLE = (-1, -1)
+# Content types accepted from the ?type= query of artifact downloads
+MIME_TYPE = re.compile(r"[\w.+-]+/[\w.+-]+")
+
+
+_etags: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_etags_lock = threading.Lock()
+
+
+def file_etag(path: str, version: Tuple[int, int]) -> str:
+    """Return the SHA-256 based ETag of path, hashing it at most once per version."""
+    with _etags_lock:
+        cached = _etags.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        etag = digest.hexdigest()[:32]
+        _etags[path] = (version, etag)
+        return etag
+
+
+class AssetServer:
+    """Serve registered files under /assets/<name> with HTTP caching."""
+
+    def __init__(self, host: str, port: int, base_url: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self._base_url = base_url.rstrip("/") if base_url else None
+        self._files: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["AssetServer"]:
+        """Return the configured server, or None if RESUME_ASSET_BASE_URL is unset."""
+        base_url = os.environ.get("RESUME_ASSET_BASE_URL")
+        if not base_url:
+            return None
+        return cls(
+            host=os.environ.get("RESUME_ASSET_HOST", "127.0.0.1"),
+            port=int(os.environ.get("RESUME_ASSET_PORT", "8502")),
+            base_url=base_url,
+        )
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url or f"http://localhost:{self.port}"
+
+    def start(self) -> "AssetServer":
+        if self._httpd is None:
+            server = self
+
+            class Handler(AssetRequestHandler):
+                asset_server = server
+
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+            self._httpd.daemon_threads = True
+            # Port 0 binds an ephemeral port
+            self.port = self._httpd.server_address[1]
+            thread = threading.Thread(target=self._httpd.serve_forever, name="asset-server", daemon=True)
+            thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def register(self, name: str, path: str):
+        with self._lock:
+            self._files[name] = os.path.abspath(path)
+
+    def resolve(self, name: str) -> Optional[str]:
+        with self._lock:
+            return self._files.get(name)
+
+    def artifact_url(self, digest: str, name: str, mime: str) -> str:
+        """Return the download URL of an artifact blob."""
+        return f"{self.base_url}/artifacts/{digest}?{urlencode({'name': name, 'type': mime})}"
+
+    def variant_url(self, key: str, name: str) -> str:
+        return f"{self.base_url}/variants/{key}/{name}"
+
+    def export_url(self, name: str, filename: str) -> str:
+        """Return the download URL of a built export bundle, saved as filename."""
+        return f"{self.base_url}/exports/{name}?{urlencode({'name': filename})}"
+
+    def pdf_pages_url(self, etag: str) -> str:
+        """Return the URL prefix of a registered PDF's pages (append /<page>/<scale>.jpg)."""
+        return f"{self.base_url}/pdf-pages/{etag}"
+
+    def url_for(self, name: str) -> Optional[str]:
+        """Return a versioned URL for a registered asset, or None if it is missing."""
+        path = self.resolve(name)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        etag = file_etag(path, (stat.st_mtime_ns, stat.st_size))
+        return f"{self.base_url}/assets/{quote(name)}?v={etag}"
+
+
+class AssetRequestHandler(BaseHTTPRequestHandler):
+    asset_server: AssetServer = None  # bound per server in AssetServer.start
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Keep the Streamlit console quiet
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool):
+        url = urlsplit(self.path)
+        if url.path == "/metrics":
+            self._serve_metrics(send_body)
+            return
+        if url.path.startswith("/artifacts/"):
+            self._serve_artifact(url.path[len("/artifacts/"):], parse_qs(url.query), send_body)
+            return
+        if url.path.startswith("/variants/"):
+            self._serve_variant(url.path[len("/variants/"):], send_body)
+            return
+        if url.path.startswith("/exports/"):
+            self._serve_export(url.path[len("/exports/"):], parse_qs(url.query), send_body)
+            return
+        if url.path.startswith("/pdf-pages/"):
+            self._serve_pdf_page(url.path[len("/pdf-pages/"):], send_body)
+            return
+        prefix = "/assets/"
+        if not url.path.startswith(prefix):
+            self.send_error(404)
+            return
+        path = self.asset_server.resolve(unquote(url.path[len(prefix):]))
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            self.send_error(404)
+            return
+
+        etag = file_etag(path, (stat.st_mtime_ns, stat.st_size))
+        versioned = parse_qs(url.query).get("v", [None])[0] == etag
+        self._send_stream(
+            lambda: open(path, "rb"), stat.st_size, f'"{etag}"',
+            mimetypes.guess_type(path)[0] or "application/octet-stream",
+            IMMUTABLE_CACHE_CONTROL if versioned else DEFAULT_CACHE_CONTROL,
+            send_body, mtime=stat.st_mtime,
+        )
+
+    def _serve_artifact(self, digest: str, query: Dict[str, list], send_body: bool):
+        from artifact_store import get_artifact_store
+
+        store = get_artifact_store()
+        try:
+            size = store.size(digest)
+        except KeyError:
+            self.send_error(404)
+            return
+        if store.is_quarantined(digest):
+            # Flagged by the upload scan: kept for review, never handed out
+            self.send_error(403)
+            return
+        name = query.get("name", [digest])[0]
+        content_type = query.get("type", [""])[0]
+        if not MIME_TYPE.fullmatch(content_type):
+            content_type = "application/octet-stream"
+        # Always a download, never rendered on this origin
+        disposition = f"attachment; filename*=UTF-8''{quote(name)}"
+        # Blobs are content-addressed, so the digest is a strong ETag forever
+        self._send_stream(
+            lambda: store.open(digest), size, f'"{digest}"',
+            content_type, IMMUTABLE_CACHE_CONTROL,
+            send_body, extra_headers={"Content-Disposition": disposition, "X-Content-Type-Options": "nosniff"},
+        )
+
+    def _serve_variant(self, variant_path: str, send_body: bool):
+        from image_variants import get_variant_store
+
+        key, _, name = variant_path.partition("/")
+        path = get_variant_store().path_for(key, name)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            self.send_error(404)
+            return
+        # Variants of a key never change once written
+        self._send_stream(
+            lambda: open(path, "rb"), stat.st_size, f'"{key}-{name}"',
+            mimetypes.guess_type(path)[0] or "application/octet-stream", IMMUTABLE_CACHE_CONTROL,
+            send_body, mtime=stat.st_mtime,
+        )
+
+    def _serve_export(self, name: str, query: Dict[str, list], send_body: bool):
+        from exports import EXPORT_FORMATS, get_export_service
+
+        path = get_export_service().path_for(name)
+        try:
+            stat = os.stat(path) if path else None
+        except OSError:
+            stat = None
+        if stat is None:
+            self.send_error(404)
+            return
+        filename = query.get("name", [name])[0]
+        # Downloads count as use, keeping the bundle from being pruned
+        get_export_service().touch(name)
+        # Named by a hash of their content, so a bundle never changes
+        self._send_stream(
+            lambda: open(path, "rb"), stat.st_size, f'"{name}"',
+            EXPORT_FORMATS[name.rsplit(".", 1)[1]], IMMUTABLE_CACHE_CONTROL, send_body, mtime=stat.st_mtime,
+            extra_headers={"Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"},
+        )
+
+    def _serve_pdf_page(self, page_path: str, send_body: bool):
+        from pdf_pages import get_pdf_page_store
+
+        etag, _, name = page_path.partition("/")
+        try:
+            data = get_pdf_page_store().page(etag, name)
+        except Exception:
+            self.send_error(500)
+            return
+        if data is None:
+            self.send_error(404)
+            return
+        # The etag pins the PDF's content, so a page at a given scale never changes
+        self._send_stream(
+            lambda: io.BytesIO(data), len(data), f'"{etag}-{name.replace("/", "-")}"',
+            "image/jpeg", IMMUTABLE_CACHE_CONTROL, send_body,
+        )
+
+    def _send_stream(
+        self,
+        open_stream: Callable[[], BinaryIO],
+        size: int,
+        quoted_etag: str,
+        content_type: str,
+        cache_control: str,
+        send_body: bool,
+        mtime: Optional[float] = None,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ):
+        """Answer a conditional and/or Range request, streaming the body in chunks."""
+        headers = {
+            "ETag": quoted_etag,
+            "Cache-Control": cache_control,
+            "Accept-Ranges": "bytes",
+            "Access-Control-Allow-Origin": "*",
+            **(extra_headers or {}),
+        }
+        if mtime is not None:
+            headers["Last-Modified"] = email.utils.formatdate(mtime, usegmt=True)
+
+        if self._not_modified(quoted_etag, mtime):
+            self.send_response(304)
+            self._send_headers(headers)
+            return
+
+        byte_range = self._requested_range(size, quoted_etag)
+        if byte_range == UNSATISFIABLE:
+            self.send_response(416)
+            self._send_headers({**headers, "Content-Range": f"bytes */{size}", "Content-Length": "0"})
+            return
+        if byte_range is None:
+            start, end = 0, size - 1
+            self.send_response(200)
+        else:
+            start, end = byte_range
+            self.send_response(206)
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        self._send_headers({**headers, "Content-Type": content_type, "Content-Length": str(end - start + 1)})
+        if send_body and end >= start:
+            with open_stream() as f:
+                f.seek(start)
+                remaining = end - start + 1
+                while remaining > 0:
+                    chunk = f.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+                    remaining -= len(chunk)
+
+    def _requested_range(self, size: int, quoted_etag: str):
+        """Return (start, end) for a single satisfiable byte range, None for the full body."""
+        header = self.headers.get("Range")
+        if not header or not header.startswith("bytes="):
+            return None
+        # A stale If-Range validator means the client's partial copy is outdated
+        if_range = self.headers.get("If-Range")
+        if if_range is not None and if_range.strip() != quoted_etag:
+            return None
+        specs = header[len("bytes="):].split(",")
+        if len(specs) != 1:
+            # Multipart ranges are optional; send the whole representation
+            return None
+        first, sep, last = specs[0].strip().partition("-")
+        try:
+            if not sep:
+                return None
+            if not first:
+                suffix = int(last)
+                if suffix <= 0:
+                    return UNSATISFIABLE
+                return max(size - suffix, 0), size - 1
+            start = int(first)
+            end = int(last) if last else size - 1
+        except ValueError:
+            return None
+        if start >= size or end < start:
+            return UNSATISFIABLE
+        return start, min(end, size - 1)
+
+    def _serve_metrics(self, send_body: bool):
+        import metrics
+
+        if not metrics.ENABLED:
+            self.send_error(404)
+            return
+        body = metrics.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _not_modified(self, quoted_etag: str, mtime: Optional[float]) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(",")]
+            return "*" in tags or quoted_etag in tags or f"W/{quoted_etag}" in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and mtime is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def _send_headers(self, headers: Dict[str, str]):
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
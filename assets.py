@@ -0,0 +1,143 @@
+import base64
+import io
+import logging
+import os
+from typing import Optional, Tuple
+
+import streamlit as st
+
+from metrics import inc, timer
+
+# =============================
+# Static Asset Cache
+# =============================
+# Decoded/resized images are shared by every session through st.cache_data.
+# Entries are keyed on (path, file version, size) so a replaced file on disk
+# yields a fresh entry while the stale one ages out of the bounded cache.
+IMAGE_CACHE_ENTRIES = 32
+
+logger = logging.getLogger("resume.assets")
+
+
+def file_version(path: str) -> Optional[Tuple[int, int]]:
+    """Return a cheap version stamp (mtime_ns, size) for path, or None if missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def encode_resized_image(path: str, size: Tuple[int, int], fmt: str = "JPEG") -> bytes:
+    """Decode path, resize it to size and return it encoded as fmt."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image = image.resize(size)
+        if fmt == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt, quality=85, optimize=True)
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=IMAGE_CACHE_ENTRIES, show_spinner=False)
+def _resized_image_bytes(path: str, version: Tuple[int, int], size: Tuple[int, int], fmt: str) -> bytes:
+    """Decode, resize and re-encode an image once per (path, version, size, fmt)."""
+    inc("asset_decodes", asset=os.path.basename(path))
+    return encode_resized_image(path, size, fmt)
+
+
+def load_resized_image(path: str, size: Tuple[int, int], fmt: str = "JPEG") -> Optional[bytes]:
+    """Return encoded bytes of path resized to size, or None if the file is missing."""
+    with timer("asset_load", asset=os.path.basename(path), kind="image"):
+        version = file_version(path)
+        if version is None:
+            return None
+        return _resized_image_bytes(path, version, size, fmt)
+
+
+@st.cache_data(max_entries=IMAGE_CACHE_ENTRIES, show_spinner=False)
+def _data_uri(path: str, version: Tuple[int, int], mime: str) -> str:
+    """Base64-encode a file into a data: URI once per (path, version)."""
+    with open(path, "rb") as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+
+def load_data_uri(path: str, mime: str) -> Optional[str]:
+    """Return path inlined as a data: URI (the fallback without the asset server), or None if missing."""
+    with timer("asset_load", asset=os.path.basename(path), kind="inline"):
+        version = file_version(path)
+        if version is None:
+            return None
+        return _data_uri(path, version, mime)
+
+
+@st.cache_resource(show_spinner=False)
+def get_asset_server():
+    """Start the process-wide static asset server on first use.
+
+    Returns None when it is not configured or its port cannot be bound; the
+    None is cached too, so a failed bind is not retried on every rerun and
+    callers render inline instead.
+    """
+    from asset_server import AssetServer
+
+    server = AssetServer.from_env()
+    if server is None:
+        return None
+    try:
+        return server.start()
+    except OSError as exc:
+        logger.warning("Asset server disabled, serving assets inline; cannot bind %s:%s: %s", server.host, server.port, exc)
+        return None
+
+
+def static_asset_url(path: str) -> Optional[str]:
+    """Register path with the asset server and return its versioned, cacheable URL.
+
+    Returns None if the file is missing or the asset server is disabled.
+    """
+    name = os.path.basename(path)
+    with timer("asset_load", asset=name, kind="url"):
+        server = get_asset_server()
+        if server is None or file_version(path) is None:
+            return None
+        server.register(name, path)
+        return server.url_for(name)
+
+
+def artifact_download_url(digest: str, name: str, mime: str) -> Optional[str]:
+    """Return the asset server URL streaming an artifact blob with Range support, or None if it is disabled."""
+    server = get_asset_server()
+    return server.artifact_url(digest, name, mime) if server is not None else None
+
+
+def export_download_url(name: str, filename: str) -> Optional[str]:
+    """Return the asset server URL of a built export bundle, or None if it is disabled."""
+    server = get_asset_server()
+    return server.export_url(name, filename) if server is not None else None
+
+
+def responsive_image_html(path: str, box: Tuple[int, int], alt: str) -> Optional[str]:
+    """Return a <picture> of path's variants fitted to box, or None if unavailable."""
+    from asset_server import file_etag
+    from image_variants import get_variant_store
+
+    with timer("asset_load", asset=os.path.basename(path), kind="variants"):
+        version = file_version(path)
+        if version is None or get_asset_server() is None:
+            return None
+        key = f"{file_etag(path, version)}-{box[0]}x{box[1]}"
+        variants = get_variant_store().ensure(key, lambda: open(path, "rb"), box)
+        return variant_picture_html(key, variants, alt, f"(max-width: {box[0]}px) 100vw, {box[0]}px", box[0])
+
+
+def variant_picture_html(key: str, variants, alt: str, sizes: str, display_width: Optional[int] = None) -> Optional[str]:
+    """Return a <picture> referencing the asset server URLs of key's variants."""
+    from image_variants import picture_html
+
+    server = get_asset_server()
+    if not variants or server is None:
+        return None
+    return picture_html(variants, lambda variant: server.variant_url(key, variant.name), alt, sizes, display_width)
@@ -0,0 +1,271 @@
+"""Headless rerun-latency and memory benchmark for the resume app.
+
+Usage: python benchmarks/bench_rerun.py [--runs 20] [--artifact-counts 0,100,1000]
+                                        [--artifact-sizes 16384] [--out bench_rerun.json]
+
+Drives resumeapp.main() through Streamlit's AppTest: every scenario (each
+artifact count at each artifact size) seeds a fresh session with N
+artifacts of that size via add_artifact, then reruns each page
+(every section in section_order, the Artefacts Manager and search) and
+records per-page rerun latency percentiles, add_artifact latency, process
+RSS and the size of the session's state. Results are written as JSON so
+two revisions can be compared with --compare.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+SESSION_KEYS = (
+    "section_order",
+    "section_labels",
+    "section_content",
+    "artefacts_by_section",
+    "artifacts",
+    "artifact_index",
+    "search_index",
+)
+
+
+def seeded_app(artifact_count: int, artifact_size: int):
+    """AppTest script: run the app and seed artifacts once per session."""
+    import io
+    import os
+    import time
+
+    import streamlit as st
+
+    from resumeapp import add_artifact, main
+
+    class BenchUpload(io.BytesIO):
+        def __init__(self, name: str, mime: str, data: bytes):
+            super().__init__(data)
+            self.name = name
+            self.type = mime
+            self.size = len(data)
+
+    main()
+    if "bench_seeded" not in st.session_state:
+        words = b"architecture capability roadmap stakeholder requirements togaf agile "
+        timings = []
+        for i in range(artifact_count):
+            if i % 2:
+                data = (b"artifact %d " % i + words * (artifact_size // len(words) + 1))[:artifact_size]
+                upload = BenchUpload(f"notes_{i}.txt", "text/plain", data)
+            else:
+                data = (b"%d" % i + os.urandom(artifact_size))[:artifact_size]
+                upload = BenchUpload(f"blob_{i}.bin", "application/octet-stream", data)
+            started = time.perf_counter()
+            add_artifact(upload, "summary")
+            timings.append(time.perf_counter() - started)
+        st.session_state.bench_seeded = timings
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000
+
+    return {
+        "n": len(ordered),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1] * 1000,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def deep_sizeof(obj, shared_ids: set, seen: Optional[set] = None) -> int:
+    """Approximate bytes reachable from obj, skipping process-wide shared objects."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen or id(obj) in shared_ids:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, shared_ids, seen) + deep_sizeof(v, shared_ids, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, shared_ids, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_sizeof(vars(obj), shared_ids, seen)
+    return size
+
+
+def shared_object_ids() -> set:
+    import content
+
+    shared = [
+        content.DEFAULT_SECTION_ORDER,
+        content.DEFAULT_SECTION_LABELS,
+        content.DEFAULT_SECTION_CONTENT,
+        content.default_search_index(),
+    ]
+    return {id(obj) for obj in shared}
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_scenario(artifact_count: int, artifact_size: int, runs: int, warmup: int) -> dict:
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(seeded_app, args=(artifact_count, artifact_size), default_timeout=600)
+    started = time.perf_counter()
+    at.run()
+    first_run = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"app raised during seeding: {at.exception}")
+
+    pages = [("section", key) for key in at.session_state["section_order"]]
+    pages += [("artefacts_manager", None), ("search", "togaf roadmap")]
+    page_results = {}
+    for page, arg in pages:
+        at.session_state["current_page"] = page
+        if page == "section":
+            at.session_state["current_section_key"] = arg
+        elif page == "search":
+            at.session_state["search_query"] = arg
+        samples = []
+        for i in range(warmup + runs):
+            started = time.perf_counter()
+            at.run()
+            if i >= warmup:
+                samples.append(time.perf_counter() - started)
+        if at.exception:
+            raise RuntimeError(f"app raised on page {page}/{arg}: {at.exception}")
+        page_results[f"{page}:{arg}" if arg else page] = percentiles(samples)
+
+    shared_ids = shared_object_ids()
+    session_bytes = {key: deep_sizeof(at.session_state[key], shared_ids) for key in SESSION_KEYS}
+    add_timings = at.session_state["bench_seeded"]
+    return {
+        "artifact_count": artifact_count,
+        "artifact_size": artifact_size,
+        "first_run_s": first_run,
+        "add_artifact": percentiles(add_timings) if add_timings else None,
+        "pages": page_results,
+        "session_state_bytes": session_bytes,
+        "session_state_total_bytes": sum(session_bytes.values()),
+        "rss_bytes": current_rss_bytes(),
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_report(report: dict):
+    for scenario in report["scenarios"]:
+        print(
+            f"\n== {scenario['artifact_count']} artifacts x {scenario['artifact_size']} B "
+            f"| session_state {scenario['session_state_total_bytes'] / 1024:.1f} KiB "
+            f"| RSS {scenario['rss_bytes'] / 2**20:.1f} MiB (peak {scenario['peak_rss_bytes'] / 2**20:.1f} MiB)"
+        )
+        if scenario["add_artifact"]:
+            add = scenario["add_artifact"]
+            print(f"   add_artifact                      p50 {add['p50_ms']:8.2f} ms  p99 {add['p99_ms']:8.2f} ms")
+        for page, stats in scenario["pages"].items():
+            print(f"   {page:<34}p50 {stats['p50_ms']:8.2f} ms  p90 {stats['p90_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms")
+
+
+def print_comparison(baseline: dict, report: dict):
+    """Print p50 rerun latency deltas against a previous JSON report."""
+    previous = {(s["artifact_count"], s["artifact_size"]): s for s in baseline["scenarios"]}
+    print(f"\n== p50 change vs {baseline['meta']['revision']}")
+    for scenario in report["scenarios"]:
+        before = previous.get((scenario["artifact_count"], scenario["artifact_size"]))
+        if before is None:
+            continue
+        scenario_name = f"{scenario['artifact_count']} x {scenario['artifact_size']} B"
+        for page, stats in scenario["pages"].items():
+            old = before["pages"].get(page)
+            if old:
+                delta = (stats["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0.0
+                print(f"   {scenario_name:>16} {page:<34}{old['p50_ms']:8.2f} -> {stats['p50_ms']:8.2f} ms ({delta:+.0f}%)")
+
+
+def free_port() -> int:
+    """Return a TCP port that was free a moment ago."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="measured reruns per page")
+    parser.add_argument("--warmup", type=int, default=2, help="unmeasured reruns per page")
+    parser.add_argument("--artifact-counts", default="0,100,1000", help="comma-separated artifact counts")
+    parser.add_argument(
+        "--artifact-sizes", "--artifact-size", default=str(16 * 1024), help="comma-separated bytes per seeded artifact"
+    )
+    parser.add_argument("--out", default="bench_rerun.json", help="JSON results file")
+    parser.add_argument("--compare", help="previous JSON results file to compare against")
+    args = parser.parse_args()
+
+    # Keep benchmark blobs, previews and the asset server away from real data
+    os.environ.setdefault("RESUME_ARTIFACT_DIR", tempfile.mkdtemp(prefix="resume-bench-"))
+    # The asset server only runs with a base URL: give it a free loopback port
+    port = os.environ.setdefault("RESUME_ASSET_PORT", str(free_port()))
+    os.environ.setdefault("RESUME_ASSET_BASE_URL", f"http://127.0.0.1:{port}")
+    # Scenarios must not load each other's seeded artifacts from the state store
+    os.environ.setdefault("RESUME_DB_PATH", "")
+
+    import streamlit
+
+    report = {
+        "meta": {
+            "revision": revision(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "scenarios": [
+            run_scenario(int(count), int(size), args.runs, args.warmup)
+            for size in args.artifact_sizes.split(",")
+            for count in args.artifact_counts.split(",")
+        ],
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""Concurrent-session load generator for the resume app.
+
+Usage: python benchmarks/load_sessions.py [--sessions 1,5,10,25] [--duration 20]
+                                          [--upload-every 5] [--upload-size 16384]
+                                          [--app resumeapp.py] [--out load_sessions.json]
+
+Starts the app with `streamlit run` on a free local port and, for each
+session count N, opens N concurrent websocket sessions that speak the
+browser's protocol: every session clicks through the sidebar's section
+buttons (section_order) and, every --upload-every clicks, opens the
+Artefacts Manager and uploads a file through its form the way the browser
+does (file URL request, HTTP PUT, form submit). Rerun latency is measured
+from sending a click until the run it triggers (including any st.rerun it
+causes) has finished. Reports p50/p95/p99 latency per action, reruns per
+second and the server's RSS (plus its processing workers) as N grows.
+Results are written as JSON so two revisions can be compared with --compare.
+
+Sessions do not emulate the browser's timed fragment reruns (run_every),
+so the sidebar's processing progress only refreshes on their clicks.
+
+Needs the websockets client library on top of the app's requirements:
+pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Tuple
+from urllib.parse import urljoin
+
+import websockets
+
+from bench_rerun import REPO_ROOT, free_port, percentiles, revision
+
+STARTUP_TIMEOUT = 60.0
+RSS_SAMPLE_SECONDS = 0.5
+UPLOAD_FORM_LABEL = "Upload an artefact"
+# Sidebar buttons whose keys start with nav_ but do not open a section
+NAV_CONTROL_PREFIXES = ("nav_group_", "nav_prev_", "nav_next_", "nav_filter", "nav_artefacts_manager")
+
+
+def start_app(app: str, port: int, log_path: str) -> subprocess.Popen:
+    """Run the app with `streamlit run` and wait until its health check answers."""
+    command = [
+        sys.executable, "-m", "streamlit", "run", app,
+        "--server.headless=true",
+        "--server.address=127.0.0.1",
+        f"--server.port={port}",
+        # Sessions upload without the browser's XSRF cookie
+        "--server.enableXsrfProtection=false",
+        "--server.fileWatcherType=none",
+        "--browser.gatherUsageStats=false",
+    ]
+    with open(log_path, "wb") as log:
+        server = subprocess.Popen(command, cwd=REPO_ROOT, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"app exited with {server.returncode} during startup; see {log_path}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                if response.status == 200:
+                    return server
+        except (urllib.error.URLError, OSError):
+            pass
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f"app did not become healthy within {STARTUP_TIMEOUT:.0f} s; see {log_path}")
+
+
+def stop_app(server: subprocess.Popen):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+
+
+def process_tree(pid: int) -> List[int]:
+    """Return pid and all of its descendants (e.g. processing workers)."""
+    children: Dict[int, List[int]] = defaultdict(list)
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after its ")"
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children[ppid].append(int(entry))
+    tree, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        stack.extend(children.get(current, ()))
+    return tree
+
+
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def server_rss(pid: int) -> Tuple[int, int]:
+    """Return (server RSS, RSS of its child processes) in bytes."""
+    return rss_bytes(pid), sum(rss_bytes(child) for child in process_tree(pid)[1:])
+
+
+def put_file(url: str, name: str, data: bytes):
+    """Upload one file the way the browser's file uploader does (multipart PUT)."""
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    request = urllib.request.Request(
+        url, data=body, method="PUT", headers={"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+
+
+class Session:
+    """One simulated browser tab connected to the app's websocket."""
+
+    def __init__(self, base_url: str, websocket):
+        self.base_url = base_url
+        self.websocket = websocket
+        self.session_id = ""
+        self.fragments: Dict[str, str] = {}  # widget id -> fragment it was drawn in
+        self.keys: Dict[str, str] = {}  # widget key -> widget id, in drawing order
+        self.labels: Dict[Tuple[str, str], Tuple[str, str]] = {}  # (type, label) -> (widget id, form id)
+        self.submitters: Dict[str, str] = {}  # form id -> submit button id
+        self.errors = 0
+
+    async def _receive(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = ForwardMsg()
+        msg.ParseFromString(await self.websocket.recv())
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.session_id = msg.new_session.initialize.session_id
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            self._track(msg.delta.new_element, msg.delta.fragment_id)
+        return msg
+
+    def _track(self, element, fragment_id: str):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors += 1
+            return
+        widget = getattr(element, kind)
+        widget_id = getattr(widget, "id", "")
+        if not widget_id:
+            return
+        self.fragments[widget_id] = fragment_id
+        # Keyed widget ids end in "-<key>"
+        if widget_id.startswith("$$ID-"):
+            key = widget_id.split("-", 2)[2]
+            if key != "None":
+                self.keys[key] = widget_id
+        form_id = getattr(widget, "form_id", "")
+        if getattr(widget, "is_form_submitter", False):
+            self.submitters[form_id] = widget_id
+        elif getattr(widget, "label", ""):
+            self.labels[(kind, widget.label)] = (widget_id, form_id)
+
+    def section_keys(self) -> List[str]:
+        """Sections the sidebar offers buttons for, in section_order."""
+        return [
+            key[len("nav_"):] for key in self.keys
+            if key.startswith("nav_") and not key.startswith(NAV_CONTROL_PREFIXES)
+        ]
+
+    async def rerun(self, states=(), fragment_id: str = "") -> float:
+        """Send a rerun and return the seconds until the run it triggers has finished."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(states)
+        msg.rerun_script.fragment_id = fragment_id
+        started = time.perf_counter()
+        await self.websocket.send(msg.SerializeToString())
+        while True:
+            reply = await self._receive()
+            # A run interrupted by st.rerun is followed by the run that replaces it
+            if reply.WhichOneof("type") == "script_finished" and reply.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return time.perf_counter() - started
+
+    async def click(self, key: str) -> float:
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        widget_id = self.keys[key]
+        return await self.rerun([WidgetState(id=widget_id, trigger_value=True)], self.fragments[widget_id])
+
+    async def upload(self, name: str, data: bytes) -> float:
+        """Upload a file through the Artefacts Manager form; return the submit's rerun latency."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        uploader_id, form_id = self.labels[("file_uploader", UPLOAD_FORM_LABEL)]
+        request = BackMsg()
+        request.file_urls_request.request_id = uuid.uuid4().hex
+        request.file_urls_request.session_id = self.session_id
+        request.file_urls_request.file_names.append(name)
+        await self.websocket.send(request.SerializeToString())
+        while True:
+            reply = await self._receive()
+            if reply.WhichOneof("type") == "file_urls_response" and reply.file_urls_response.response_id == request.file_urls_request.request_id:
+                break
+        file_urls = reply.file_urls_response.file_urls[0]
+        await asyncio.to_thread(put_file, urljoin(self.base_url, file_urls.upload_url), name, data)
+
+        uploader = WidgetState(id=uploader_id)
+        uploader.file_uploader_state_value.uploaded_file_info.add(file_id=file_urls.file_id, name=name, size=len(data))
+        submit_id = self.submitters[form_id]
+        return await self.rerun([uploader, WidgetState(id=submit_id, trigger_value=True)], self.fragments[submit_id])
+
+
+def upload_data(session_index: int, step: int, size: int) -> bytes:
+    # Distinct per upload, so content-hash deduplication does not skip the work
+    words = b"architecture capability roadmap stakeholder requirements togaf agile "
+    header = b"load session %d upload %d\n" % (session_index, step)
+    return (header + words * (size // len(words) + 1))[:size]
+
+
+async def run_session(port: int, index: int, deadline: float, args, samples: Dict[str, List[float]]) -> int:
+    """Drive one session until deadline; return the number of errors it saw."""
+    base_url = f"http://127.0.0.1:{port}"
+    async with websockets.connect(
+        f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"], max_size=None
+    ) as websocket:
+        session = Session(base_url, websocket)
+        try:
+            samples["connect"].append(await asyncio.wait_for(session.rerun(), args.timeout))
+            step = 0
+            while time.perf_counter() < deadline:
+                if args.upload_every and step % args.upload_every == args.upload_every - 1:
+                    samples["open_manager"].append(await asyncio.wait_for(session.click("nav_artefacts_manager"), args.timeout))
+                    data = upload_data(index, step, args.upload_size)
+                    samples["upload"].append(await asyncio.wait_for(session.upload(f"load_{index}_{step}.txt", data), args.timeout))
+                else:
+                    sections = session.section_keys()
+                    samples["navigate"].append(await asyncio.wait_for(session.click(f"nav_{sections[step % len(sections)]}"), args.timeout))
+                step += 1
+                if args.think:
+                    await asyncio.sleep(args.think)
+        except (asyncio.TimeoutError, KeyError, IndexError, OSError, websockets.ConnectionClosed) as exc:
+            print(f"   session {index}: {type(exc).__name__}: {exc}", file=sys.stderr)
+            return session.errors + 1
+        return session.errors
+
+
+async def sample_rss(pid: int, peak: List[int], stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], sum(server_rss(pid)))
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_level(server: subprocess.Popen, port: int, sessions: int, args) -> dict:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    peak, stop = [0], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(server.pid, peak, stop))
+    started = time.perf_counter()
+    errors = await asyncio.gather(
+        *(run_session(port, i, started + args.duration, args, samples) for i in range(sessions))
+    )
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    rss, workers_rss = server_rss(server.pid)
+
+    actions = {kind: values for kind, values in samples.items() if kind != "connect"}
+    reruns = [value for values in actions.values() for value in values]
+    return {
+        "sessions": sessions,
+        "elapsed_s": elapsed,
+        "reruns": len(reruns),
+        "reruns_per_s": len(reruns) / elapsed,
+        "uploads": len(samples["upload"]),
+        "errors": sum(errors),
+        "latency": percentiles(reruns) if reruns else None,
+        "actions": {kind: percentiles(values) for kind, values in sorted(samples.items()) if values},
+        "server_rss_bytes": rss,
+        "workers_rss_bytes": workers_rss,
+        "peak_rss_bytes": max(peak[0], rss + workers_rss),
+    }
+
+
+def print_report(report: dict):
+    for level in report["levels"]:
+        print(
+            f"\n== {level['sessions']} sessions | {level['reruns']} reruns in {level['elapsed_s']:.1f} s "
+            f"({level['reruns_per_s']:.1f}/s) | RSS {level['server_rss_bytes'] / 2**20:.1f} MiB "
+            f"+ workers {level['workers_rss_bytes'] / 2**20:.1f} MiB (peak {level['peak_rss_bytes'] / 2**20:.1f} MiB) "
+            f"| {level['errors']} errors"
+        )
+        rows = [("all reruns", level["latency"])] + list(level["actions"].items())
+        for name, stats in rows:
+            if stats:
+                print(f"   {name:<16}p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  p99 {stats['p99_ms']:8.2f} ms")
+
+
+def print_comparison(baseline: dict, report: dict):
+    """Print throughput and p95 rerun latency changes against a previous JSON report."""
+    previous = {level["sessions"]: level for level in baseline["levels"]}
+    print(f"\n== change vs {baseline['meta']['revision']}")
+    for level in report["levels"]:
+        before = previous.get(level["sessions"])
+        if before is None or not before["latency"] or not level["latency"]:
+            continue
+        old_p95, new_p95 = before["latency"]["p95_ms"], level["latency"]["p95_ms"]
+        delta = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        print(
+            f"   {level['sessions']:>4} sessions  {before['reruns_per_s']:6.1f} -> {level['reruns_per_s']:6.1f} reruns/s"
+            f"  p95 {old_p95:8.2f} -> {new_p95:8.2f} ms ({delta:+.0f}%)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default="resumeapp.py", help="app script to run, relative to the repository")
+    parser.add_argument("--sessions", default="1,5,10,25", help="comma-separated concurrent session counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds each session count runs for")
+    parser.add_argument("--upload-every", type=int, default=5, help="upload a file every N clicks (0: never)")
+    parser.add_argument("--upload-size", type=int, default=16 * 1024, help="bytes per uploaded file")
+    parser.add_argument("--think", type=float, default=0.0, help="seconds each session waits between clicks")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds before a rerun counts as failed")
+    parser.add_argument("--out", default="load_sessions.json", help="JSON results file")
+    parser.add_argument("--compare", help="previous JSON results file to compare against")
+    args = parser.parse_args()
+
+    # Keep uploaded blobs, previews and the asset server away from real data
+    work_dir = tempfile.mkdtemp(prefix="resume-load-")
+    os.environ.setdefault("RESUME_ARTIFACT_DIR", os.path.join(work_dir, "artifacts"))
+    # The asset server only runs with a base URL: give it a free loopback port
+    port = os.environ.setdefault("RESUME_ASSET_PORT", str(free_port()))
+    os.environ.setdefault("RESUME_ASSET_BASE_URL", f"http://127.0.0.1:{port}")
+    # Simulated sessions must not persist into (or restore from) the state store
+    os.environ.setdefault("RESUME_DB_PATH", "")
+
+    import streamlit
+
+    port = free_port()
+    log_path = os.path.join(work_dir, "server.log")
+    server = start_app(args.app, port, log_path)
+    try:
+        levels = [asyncio.run(run_level(server, port, int(count), args)) for count in args.sessions.split(",")]
+    finally:
+        stop_app(server)
+    report = {
+        "meta": {
+            "revision": revision(),
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "streamlit": streamlit.__version__,
+            "platform": platform.platform(),
+            "app": args.app,
+            "duration_s": args.duration,
+            "upload_every": args.upload_every,
+            "upload_size": args.upload_size,
+            "think_s": args.think,
+        },
+        "levels": levels,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print_report(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), report)
+    print(f"\nResults written to {args.out}; server log in {log_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+import io
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import BinaryIO, Callable, Dict, NamedTuple, Optional
+
+from metrics import inc, observe, set_gauge
+
+# =============================
+# Compression at Rest
+# =============================
+# Text-like artifacts (documents, CSV, JSON, SVG/HTML exports) are stored
+# compressed; formats that already carry their own compression (JPEG, PNG,
+# video, ZIP-based office files, PDF) are stored as-is. The codec is picked
+# per MIME type: zstd when the zstandard package is installed, zlib
+# otherwise. A compressed blob starts with its uncompressed size, so sizes and
+# HTTP Content-Length are known without decompressing. Its content is
+# compressed in independent FRAME_SIZE frames indexed at the end of the file,
+# so a Range request decompresses at most one frame before its first byte.
+# Digests, ETags and deduplication always refer to the uncompressed content.
+#
+# Configuration (environment):
+#   RESUME_ARTIFACT_COMPRESSION  "auto" (default), "zstd", "zlib" or "off"
+
+READ_CHUNK_SIZE = 64 * 1024
+# Keep the raw blob unless compression saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+SIZE_HEADER = struct.Struct(">Q")
+# Set in the size header of blobs stored as frames (earlier blobs are one stream)
+FRAMED = 1 << 63
+FRAME_SIZE = 1024 * 1024
+# Ends a framed blob, after one SIZE_HEADER per frame holding its compressed length
+FRAME_TRAILER = struct.Struct(">QQ")  # uncompressed bytes per frame, frame count
+
+# Already-compressed formats; compressing them again only costs CPU
+INCOMPRESSIBLE_MIME_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+INCOMPRESSIBLE_MIME_TYPES = {
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/epub+zip",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "application/vnd.oasis.opendocument.text",
+}
+# Compressible even though their major type says otherwise
+COMPRESSIBLE_MIME_TYPES = {"image/svg+xml", "image/bmp", "image/tiff", "audio/wav", "audio/x-wav"}
+
+
+class Codec(NamedTuple):
+    name: str
+    suffix: str  # file name suffix of blobs stored with this codec
+    compressor: Callable[[], object]  # -> object with compress(data) and flush()
+    # file positioned at a compressed stream -> raw stream over it whose
+    # readinto() never decompresses more than the buffer holds
+    reader: Callable[[BinaryIO], BinaryIO]
+
+
+class ZlibReader(io.RawIOBase):
+    """Decompress one zlib stream from a file, at most len(buffer) bytes per readinto."""
+
+    def __init__(self, file: BinaryIO):
+        self._file = file
+        self._decompressor = zlib.decompressobj()
+        self._capped = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        decompressor = self._decompressor
+        while len(buffer) and not decompressor.eof:
+            # Input left over by a capped call comes first; a capped call may
+            # also have left output inside zlib, drained by passing no input
+            data = decompressor.unconsumed_tail
+            if not data and not self._capped:
+                data = self._file.read(READ_CHUNK_SIZE)
+                if not data:
+                    return 0
+            out = decompressor.decompress(data, len(buffer))
+            self._capped = len(out) == len(buffer)
+            if out:
+                buffer[:len(out)] = out
+                return len(out)
+        return 0
+
+
+CODECS: Dict[str, Codec] = {
+    "zlib": Codec("zlib", ".zz", lambda: zlib.compressobj(6), ZlibReader),
+}
+try:
+    import zstandard
+
+    CODECS["zstd"] = Codec(
+        "zstd", ".zst",
+        lambda: zstandard.ZstdCompressor(level=3).compressobj(),
+        # Stops at the end of the frame; reads are bounded by the requested size
+        lambda file: zstandard.ZstdDecompressor().stream_reader(file, read_size=READ_CHUNK_SIZE, closefd=False),
+    )
+except ImportError:
+    pass
+
+
+def configured_codec() -> Optional[Codec]:
+    """Return the codec selected by RESUME_ARTIFACT_COMPRESSION, or None when off."""
+    setting = os.environ.get("RESUME_ARTIFACT_COMPRESSION", "auto").lower()
+    if setting == "off":
+        return None
+    if setting == "auto":
+        return CODECS.get("zstd") or CODECS["zlib"]
+    if setting not in CODECS:
+        raise ValueError(f"Unknown or unavailable RESUME_ARTIFACT_COMPRESSION codec {setting!r}")
+    return CODECS[setting]
+
+
+def is_compressible(mime: str) -> bool:
+    mime = mime.split(";", 1)[0].strip().lower()
+    if mime in COMPRESSIBLE_MIME_TYPES:
+        return True
+    return mime not in INCOMPRESSIBLE_MIME_TYPES and not mime.startswith(INCOMPRESSIBLE_MIME_PREFIXES)
+
+
+class CompressionStats:
+    """Process-wide totals of what compression at rest saved and cost."""
+
+    def __init__(self):
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.cpu_seconds = 0.0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def record(self, raw_bytes: int, stored_bytes: int, cpu_seconds: float):
+        with self._lock:
+            self.raw_bytes += raw_bytes
+            self.stored_bytes += stored_bytes
+            self.cpu_seconds += cpu_seconds
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / self.stored_bytes if self.stored_bytes else 1.0
+
+
+compression_stats = CompressionStats()
+
+
+def compress_file(src_path: str, dst_path: str, raw_size: int, codec: Codec) -> Optional[int]:
+    """Write src compressed with codec to dst; return its size, or None if not worth keeping."""
+    started = time.process_time()
+    lengths = []
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        dst.write(SIZE_HEADER.pack(raw_size | FRAMED))
+        for frame in iter(lambda: src.read(FRAME_SIZE), b""):
+            compressor = codec.compressor()
+            start = dst.tell()
+            for i in range(0, len(frame), READ_CHUNK_SIZE):
+                dst.write(compressor.compress(frame[i:i + READ_CHUNK_SIZE]))
+            dst.write(compressor.flush())
+            lengths.append(dst.tell() - start)
+        dst.write(b"".join(SIZE_HEADER.pack(length) for length in lengths))
+        dst.write(FRAME_TRAILER.pack(FRAME_SIZE, len(lengths)))
+        stored_size = dst.tell()
+    cpu_seconds = time.process_time() - started
+    observe("artifact_compress", cpu_seconds, codec=codec.name)
+    if stored_size > raw_size * (1 - MIN_COMPRESSION_SAVING):
+        os.unlink(dst_path)
+        compression_stats.skipped += 1
+        inc("artifact_compression_skipped", codec=codec.name)
+        return None
+    compression_stats.record(raw_size, stored_size, cpu_seconds)
+    inc("artifact_raw_bytes", raw_size, codec=codec.name)
+    inc("artifact_stored_bytes", stored_size, codec=codec.name)
+    set_gauge("artifact_compression_ratio", compression_stats.ratio)
+    return stored_size
+
+
+def read_raw_size(path: str) -> int:
+    with open(path, "rb") as f:
+        return SIZE_HEADER.unpack(f.read(SIZE_HEADER.size))[0] & ~FRAMED
+
+
+class FrameView(io.RawIOBase):
+    """Read-only view of length bytes of file starting at offset."""
+
+    def __init__(self, file: BinaryIO, offset: int, length: int):
+        self._file = file
+        self._offset = offset
+        self._remaining = length
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = min(len(buffer), self._remaining)
+        if not count:
+            return 0
+        self._file.seek(self._offset)
+        count = self._file.readinto(memoryview(buffer)[:count])
+        self._offset += count
+        self._remaining -= count
+        return count
+
+
+class DecompressingReader(io.RawIOBase):
+    """Seekable, read-only stream over a compressed blob, decompressed in chunks.
+
+    A seek starts decompressing at the frame holding the target and discards
+    up to it, so it costs at most one frame (the whole stream for blobs
+    stored before frames). Memory stays bounded by the read size either way.
+    """
+
+    def __init__(self, path: str, codec: Codec):
+        self._file = open(path, "rb")
+        self._codec = codec
+        header = SIZE_HEADER.unpack(self._file.read(SIZE_HEADER.size))[0]
+        self.size = header & ~FRAMED
+        # (file offset, compressed length) of each frame; a blob stored before
+        # frames is a single frame
+        self._frame_size = self.size
+        if header & FRAMED:
+            end = self._file.seek(-FRAME_TRAILER.size, io.SEEK_END)
+            self._frame_size, count = FRAME_TRAILER.unpack(self._file.read(FRAME_TRAILER.size))
+            self._file.seek(end - count * SIZE_HEADER.size)
+            lengths = struct.unpack(f">{count}Q", self._file.read(count * SIZE_HEADER.size))
+        else:
+            lengths = (os.fstat(self._file.fileno()).st_size - SIZE_HEADER.size,)
+        self._frames = []
+        offset = SIZE_HEADER.size
+        for length in lengths:
+            self._frames.append((offset, length))
+            offset += length
+        self._start_frame(0)
+
+    def _start_frame(self, index: int):
+        self._frame = index
+        self._position = index * self._frame_size
+        self._stream = None
+        if index < len(self._frames):
+            # Decoders only see their frame's bytes, never the next frame or the index
+            self._stream = self._codec.reader(FrameView(self._file, *self._frames[index]))
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        while self._stream is not None:
+            count = self._stream.readinto(buffer)
+            if count:
+                self._position += count
+                return count
+            self._start_frame(self._frame + 1)
+        return 0
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        target = max(0, min(offset, self.size))
+        frame = min(target // self._frame_size, len(self._frames) - 1) if self._frame_size else 0
+        if target < self._position or frame > self._frame:
+            self._start_frame(max(frame, 0))
+        scratch = bytearray(READ_CHUNK_SIZE)
+        while self._position < target:
+            view = memoryview(scratch)[:min(READ_CHUNK_SIZE, target - self._position)]
+            if not self.readinto(view):
+                break
+        return self._position
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_compressed(path: str, codec: Codec) -> BinaryIO:
+    return io.BufferedReader(DecompressingReader(path, codec), READ_CHUNK_SIZE)
@@ -0,0 +1,209 @@
+"""Pre-render the resume to a static site.
+
+Usage: python build_static.py [--out dist]
+
+Every section is converted from markdown once and written into a single
+index.html, with the media of the section renderers the app is configured
+with (RESUME_SECTION_RENDERERS, see section_renderers.py). Images are written as responsive WebP/JPEG variants and PDFs
+as-is under assets/ with content-hashed file names, so they can be cached
+forever. Text assets get precompressed .gz (and .br when the brotli
+package is installed) variants for static servers that support them
+(e.g. nginx gzip_static).
+"""
+import argparse
+import gzip
+import hashlib
+import html
+import os
+import shutil
+import sys
+from typing import Callable, Dict, List, Optional, Tuple
+
+from content import resume_content
+from image_variants import encode_variants, picture_html
+from section_renderers import (
+    INFOGRAPHIC_IMAGE,
+    INFOGRAPHIC_IMAGE_SIZE,
+    INFOGRAPHIC_PDF,
+    RENDERERS,
+    configured_section_renderers,
+)
+
+# =============================
+# Build Configuration
+# =============================
+PAGE_TITLE = "Interactive Resume & Job Artefacts"
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".svg", ".json", ".txt", ".pdf")
+# Skip a precompressed variant unless it saves at least this fraction
+MIN_COMPRESSION_SAVING = 0.1
+
+STYLESHEET = """
+body { margin: 0; font-family: "Source Sans Pro", system-ui, sans-serif; color: #31333f; display: flex; }
+nav { position: sticky; top: 0; height: 100vh; width: 18rem; flex-shrink: 0; overflow-y: auto;
+      background: #f0f2f6; padding: 1.5rem 1rem; box-sizing: border-box; }
+nav h1 { font-size: 1.4rem; margin-top: 0; }
+nav a { display: block; padding: 0.5rem 0.75rem; margin-bottom: 0.4rem; border: 1px solid #d6d6d9;
+        border-radius: 0.5rem; background: #fff; color: inherit; text-decoration: none; }
+nav a:hover { border-color: #ff4b4b; color: #ff4b4b; }
+main { flex: 1; max-width: 60rem; padding: 2rem 3rem; }
+section { padding-bottom: 2rem; border-bottom: 1px solid #e6e6e6; margin-bottom: 2rem; }
+img { max-width: 100%; height: auto; }
+iframe { width: 100%; height: 800px; border: 0; }
+"""
+
+
+def content_hashed_name(name: str, data: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+
+
+def write_asset(out_dir: str, name: str, data: bytes) -> str:
+    """Write data under assets/ with a content-hashed name; return its relative URL."""
+    hashed = content_hashed_name(name, data)
+    with open(os.path.join(out_dir, "assets", hashed), "wb") as f:
+        f.write(data)
+    return f"assets/{hashed}"
+
+
+def precompress(path: str) -> List[str]:
+    """Write .gz/.br siblings of path when they are worth it; return their paths."""
+    with open(path, "rb") as f:
+        data = f.read()
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+
+        variants[".br"] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) <= len(data) * (1 - MIN_COMPRESSION_SAVING):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+def write_image_variants(out_dir: str, path: str, box: Tuple[int, int], alt: str) -> str:
+    """Write the responsive variants of an image under assets/ and return their <picture>."""
+    with open(path, "rb") as f:
+        encoded = encode_variants(f, box)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    urls = {variant: write_asset(out_dir, f"{stem}-{variant.name}", data) for variant, data in encoded.items()}
+    return picture_html(list(encoded), urls.__getitem__, alt, f"(max-width: {box[0]}px) 100vw, {box[0]}px", box[0])
+
+
+def static_infographic_image(out_dir: str, source_dir: str) -> Optional[str]:
+    path = os.path.join(source_dir, INFOGRAPHIC_IMAGE)
+    if not os.path.exists(path):
+        return None
+    return write_image_variants(out_dir, path, INFOGRAPHIC_IMAGE_SIZE, "Experience infographic")
+
+
+def static_infographic_pdf(out_dir: str, source_dir: str) -> Optional[str]:
+    path = os.path.join(source_dir, INFOGRAPHIC_PDF)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        url = write_asset(out_dir, INFOGRAPHIC_PDF, f.read())
+    return (
+        "<h3>Experience Infographic</h3>"
+        f'<iframe src="{url}" title="Experience infographic" loading="lazy"></iframe>'
+    )
+
+
+# Static counterparts of the registered section renderers, by renderer name:
+# each writes its assets and returns the HTML it adds to a section
+STATIC_RENDERERS: Dict[str, Callable[[str, str], Optional[str]]] = {
+    "infographic_image": static_infographic_image,
+    "infographic_pdf": static_infographic_pdf,
+}
+
+
+def render_section_media(
+    section_key: str, section_renderers: Dict[str, List[str]], media: Dict[str, Optional[str]]
+) -> Tuple[str, str]:
+    """Return (html before, html after) the section body, mirroring the app layout."""
+    placed = {"before": [], "after": []}
+    for name in section_renderers.get(section_key, ()):
+        if media.get(name):
+            placed[RENDERERS[name].placement].append(media[name])
+    return "".join(placed["before"]), "".join(placed["after"])
+
+
+def render_page(stylesheet_url: str, section_renderers: Dict[str, List[str]], media: Dict[str, Optional[str]]) -> str:
+    import markdown
+
+    converter = markdown.Markdown(extensions=["sane_lists"])
+    content = resume_content()
+    nav, sections = [], []
+    for key in content.order:
+        label = html.escape(content.labels.get(key, key.title()))
+        # Keys can come from a user's resume file
+        anchor = html.escape(key, quote=True)
+        converter.reset()
+        body = converter.convert(content.content.get(key, "_No content for this section yet._"))
+        before, after = render_section_media(key, section_renderers, media)
+        nav.append(f'<a href="#{anchor}">{label}</a>')
+        sections.append(f'<section id="{anchor}"><h1>{label}</h1>{before}{body}{after}</section>')
+    return (
+        "<!DOCTYPE html>\n"
+        '<html lang="en"><head><meta charset="utf-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">'
+        f"<title>{html.escape(PAGE_TITLE)}</title>"
+        f'<link rel="stylesheet" href="{stylesheet_url}"></head>'
+        f'<body><nav><h1>Resume Navigator</h1>{"".join(nav)}</nav>'
+        f'<main>{"".join(sections)}</main></body></html>\n'
+    )
+
+
+def build(
+    out_dir: str, source_dir: Optional[str] = None, section_renderers: Optional[Dict[str, List[str]]] = None
+) -> List[str]:
+    """Build the static site into out_dir and return the written file paths.
+
+    section_renderers maps section keys to renderer names, as for the app
+    (default: configured).
+    """
+    source_dir = source_dir or os.path.dirname(os.path.abspath(__file__))
+    if section_renderers is None:
+        section_renderers = configured_section_renderers()
+    # Hashed asset names change with content, so drop the previous build's assets
+    shutil.rmtree(os.path.join(out_dir, "assets"), ignore_errors=True)
+    os.makedirs(os.path.join(out_dir, "assets"))
+
+    # Each renderer in use writes its assets once, however many sections use it
+    media: Dict[str, Optional[str]] = {}
+    for name in dict.fromkeys(name for names in section_renderers.values() for name in names):
+        if name in STATIC_RENDERERS:
+            media[name] = STATIC_RENDERERS[name](out_dir, source_dir)
+        else:
+            print(f"Section renderer {name!r} has no static version; skipped", file=sys.stderr)
+    stylesheet_url = write_asset(out_dir, "style.css", STYLESHEET.encode("utf-8"))
+
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render_page(stylesheet_url, section_renderers, media))
+
+    written = []
+    for root, _, files in os.walk(out_dir):
+        for name in sorted(files):
+            if name.endswith((".gz", ".br")):
+                continue
+            path = os.path.join(root, name)
+            written.append(path)
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                written.extend(precompress(path))
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-render the resume to static HTML.")
+    parser.add_argument("--out", default="dist", help="output directory")
+    args = parser.parse_args()
+    for path in build(args.out):
+        print(f"{os.path.getsize(path):>9}  {path}")
+
+
+if __name__ == "__main__":
+    main()
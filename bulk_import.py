@@ -0,0 +1,265 @@
+"""Bulk-import job artefacts from a directory or ZIP archive.
+
+Usage: python bulk_import.py PATH [--map "GLOB=SECTION" ...] [--by-folder]
+                             [--default-section summary] [--workers N]
+
+Files are hashed, MIME-sniffed, stored, scanned, text-extracted, previewed
+and (for images) resized to responsive variants in parallel by the
+post-upload processing pool (processing.py), so an import started from the
+app shares its bounded workers instead of starting a pool of its own. They
+are then assigned to sections by the mapping rules and committed to the
+state store in one transaction, so every session started afterwards sees
+the whole batch.
+
+Section rules are tried in order: the first --map glob that matches a file's
+path inside the source wins; with --by-folder, a file's top-level folder
+names its section (an existing label or key, otherwise a new custom section);
+everything else goes to --default-section.
+"""
+import argparse
+import fnmatch
+import os
+import secrets
+import sys
+import time
+import zipfile
+from concurrent.futures import as_completed
+from datetime import datetime
+from typing import Callable, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from artifact_store import MAX_UPLOAD_BYTES, get_artifact_store
+from content import SectionKeyAllocator, custom_section_content, resume_content
+from persistence import get_state_store
+from processing import ProcessingQueue, get_processing_queue, process_blob
+
+# =============================
+# Import Configuration
+# =============================
+# Hidden files and archive metadata that are never artefacts
+SKIPPED_PREFIXES = (".", "__MACOSX")
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Most files one pool job processes
+IMPORT_BATCH_FILES = 32
+
+
+class ImportedFile(NamedTuple):
+    path: str  # relative path inside the source directory or archive
+    digest: str
+    size: int
+    mime: str
+    text: str  # extracted searchable text
+
+
+class ImportReport(NamedTuple):
+    files: List[ImportedFile]
+    failed: List[Tuple[str, str]]  # (path, error)
+    total_bytes: int
+    seconds: float
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.files) / self.seconds if self.seconds else 0.0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.total_bytes / (1024 * 1024) / self.seconds if self.seconds else 0.0
+
+
+class ImportPlan(NamedTuple):
+    sections: List[Tuple[str, str, str]]  # new (key, label, content)
+    artifacts: List[Tuple[str, dict]]  # (artifact_id, metadata)
+
+    def renamed(self, keys: Dict[str, str]) -> "ImportPlan":
+        """Apply the section re-keying StateStore.save_batch reports."""
+        if not keys:
+            return self
+        return ImportPlan(
+            [(keys.get(key, key), label, content) for key, label, content in self.sections],
+            [
+                (artifact_id, dict(meta, section_key=keys[meta["section_key"]]) if meta["section_key"] in keys else meta)
+                for artifact_id, meta in self.artifacts
+            ],
+        )
+
+
+ProgressCallback = Callable[[int, int, int], None]  # (files done, files total, bytes done)
+
+
+def list_sources(source: str) -> List[str]:
+    """Return the relative paths of importable files in a directory or ZIP archive."""
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            paths = [info.filename for info in archive.infolist() if not info.is_dir()]
+    else:
+        paths = []
+        for root, dirs, files in os.walk(source):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(SKIPPED_PREFIXES))
+            for name in sorted(files):
+                paths.append(os.path.relpath(os.path.join(root, name), source).replace(os.sep, "/"))
+    return [path for path in paths if not any(part.startswith(SKIPPED_PREFIXES) for part in path.split("/"))]
+
+
+# =============================
+# Worker Processes
+# =============================
+def _process_batch(source: str, paths: List[str], max_bytes: int) -> List[Tuple[str, Optional[ImportedFile], str]]:
+    """Process a batch of files; return (path, imported file or None, error) for each."""
+    # Opening a ZIP parses its whole central directory, so a job opens it once
+    # per batch, and closes it at the end: the shared pool outlives the import
+    # and the app deletes its temporary archive afterwards
+    archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+    results = []
+    try:
+        for path in paths:
+            try:
+                stream = archive.open(path) if archive is not None else open(os.path.join(source, path), "rb")
+                results.append((path, _process(stream, path, max_bytes), ""))
+            except Exception as exc:
+                results.append((path, None, str(exc)))
+    finally:
+        if archive is not None:
+            archive.close()
+    return results
+
+
+def _process(stream, path: str, max_bytes: int) -> ImportedFile:
+    with stream:
+        stored = get_artifact_store().ingest(stream, max_bytes=max_bytes)
+    # Already in a worker process: run the post-upload steps inline
+    result = process_blob(stored.digest, stored.mime)
+    if result.state != "done":
+        raise ValueError(f"rejected: {result.detail}")
+    return ImportedFile(path, stored.digest, stored.size, stored.mime, result.text)
+
+
+def process_source(
+    source: str,
+    queue: Optional[ProcessingQueue] = None,
+    max_bytes: int = MAX_UPLOAD_BYTES,
+    on_progress: Optional[ProgressCallback] = None,
+) -> ImportReport:
+    """Ingest every file of source into the artifact store on queue's pool (default: the process-wide one)."""
+    started = time.perf_counter()
+    if queue is None:
+        queue = get_processing_queue()
+    source = os.path.abspath(source)
+    paths = list_sources(source)
+    files: List[ImportedFile] = []
+    failed: List[Tuple[str, str]] = []
+    total_bytes = 0
+    # A few batches per worker keep the pool busy and progress moving
+    size = max(1, min(IMPORT_BATCH_FILES, -(-len(paths) // (queue.workers * 4))))
+    batches = [paths[i:i + size] for i in range(0, len(paths), size)]
+    futures = {queue.run(_process_batch, source, batch, max_bytes): batch for batch in batches}
+    done = 0
+    for future in as_completed(futures):
+        try:
+            results = future.result()
+        except Exception as exc:
+            # The job itself failed (e.g. a worker died): fail its whole batch
+            results = [(path, None, str(exc)) for path in futures[future]]
+        for path, imported, error in results:
+            if imported is None:
+                failed.append((path, error))
+            else:
+                files.append(imported)
+                total_bytes += imported.size
+        done += len(results)
+        if on_progress is not None:
+            on_progress(done, len(paths), total_bytes)
+    files.sort(key=lambda imported: imported.path)
+    return ImportReport(files, failed, total_bytes, time.perf_counter() - started)
+
+
+# =============================
+# Section Assignment
+# =============================
+def parse_section_rules(specs: Sequence[str]) -> List[Tuple[str, str]]:
+    """Parse ["GLOB=SECTION", ...] into (glob, section) pairs."""
+    rules = []
+    for spec in specs:
+        pattern, sep, section = spec.partition("=")
+        if not sep or not pattern.strip() or not section.strip():
+            raise ValueError(f"Section rule {spec!r} must look like GLOB=SECTION")
+        rules.append((pattern.strip(), section.strip()))
+    return rules
+
+
+def plan_import(
+    files: Sequence[ImportedFile],
+    section_labels: Mapping[str, str],
+    rules: Sequence[Tuple[str, str]] = (),
+    by_folder: bool = False,
+    default_section: str = "summary",
+) -> ImportPlan:
+    """Assign each file to a section, allocating keys for the new sections needed."""
+    key_by_name = {key.lower(): key for key in section_labels}
+    key_by_name.update({label.lower(): key for key, label in section_labels.items()})
+    keys = SectionKeyAllocator(section_labels)
+    new_sections: List[Tuple[str, str, str]] = []
+
+    def section_key(name: str) -> str:
+        key = key_by_name.get(name.lower())
+        if key is None:
+            key = key_by_name[name.lower()] = keys.allocate(name)
+            new_sections.append((key, name, custom_section_content(name)))
+        return key
+
+    created_at = datetime.utcnow()
+    # The random part keeps ids unique across sessions sharing the state store
+    stamp = f"{created_at.strftime('%Y%m%d%H%M%S%f')}_{secrets.token_hex(4)}"
+    artifacts = []
+    for i, imported in enumerate(files):
+        target = next((section for pattern, section in rules if fnmatch.fnmatch(imported.path, pattern)), None)
+        if target is None and by_folder and "/" in imported.path:
+            target = imported.path.split("/", 1)[0]
+        artifacts.append((f"artifact_{stamp}_{i:05d}", {
+            "name": imported.path.rsplit("/", 1)[-1],
+            "mime": imported.mime,
+            "sha256": imported.digest,
+            "size": imported.size,
+            "section_key": section_key(target or default_section),
+            "created_at": created_at.isoformat() + "Z",
+        }))
+    return ImportPlan(new_sections, artifacts)
+
+
+# =============================
+# CLI
+# =============================
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import job artefacts from a directory or ZIP archive.")
+    parser.add_argument("source", help="directory or .zip archive")
+    parser.add_argument("--map", action="append", default=[], metavar="GLOB=SECTION", help="section rule (repeatable)")
+    parser.add_argument("--by-folder", action="store_true", help="use each file's top-level folder as its section")
+    parser.add_argument("--default-section", default="summary", help="section for unmatched files")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="worker processes")
+    args = parser.parse_args()
+
+    store = get_state_store()
+    if store is None:
+        parser.error("persistence is disabled (RESUME_DB_PATH is empty); nothing would be saved")
+    rules = parse_section_rules(args.map)
+
+    def progress(done: int, total: int, done_bytes: int):
+        print(f"\r{done}/{total} files, {done_bytes / (1024 * 1024):.1f} MB", end="", file=sys.stderr, flush=True)
+
+    report = process_source(args.source, ProcessingQueue(args.workers), on_progress=progress)
+    print(file=sys.stderr)
+
+    labels: Dict[str, str] = dict(resume_content().labels)
+    labels.update(store.section_labels())
+    plan = plan_import(report.files, labels, rules, args.by_folder, args.default_section)
+    store.save_batch(plan.sections, plan.artifacts, SectionKeyAllocator(labels).allocate)
+
+    for path, error in report.failed:
+        print(f"failed  {path}: {error}", file=sys.stderr)
+    print(
+        f"Imported {len(report.files)} file(s), {report.total_bytes / (1024 * 1024):.1f} MB in {report.seconds:.2f} s "
+        f"({report.files_per_second:.1f} files/s, {report.megabytes_per_second:.1f} MB/s); "
+        f"{len(plan.sections)} new section(s), {len(report.failed)} failure(s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,435 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Container, Mapping, MutableMapping, Sequence
+from types import MappingProxyType
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+# =============================
+# Shared Default Resume Content
+# =============================
+# The default resume is identical for every visitor, so it is built once per
+# process as read-only structures. Each session wraps them in thin
+# copy-on-write overlays that only store what the session changes, such as
+# sections added through add_custom_section.
+#
+# The sections can come from a JSON or YAML resume file instead of the
+# built-in ones below:
+#
+#   {"sections": [{"key": "summary", "label": "Professional Summary",
+#                  "content": "- markdown ..."}, ...]}
+#
+# "key" is optional and derived from the label when missing. The file is
+# parsed once per modification time; when it changes, only the sections whose
+# label or content differ are re-indexed and sessions pick up the new
+# content on their next rerun. A file that fails to parse keeps the previous
+# content in place.
+#
+# Configuration (environment):
+#   RESUME_CONTENT_PATH  resume file, .json/.yaml/.yml (default resume.json;
+#                        the built-in sections are used while it is missing)
+
+DEFAULT_SECTION_ORDER: Tuple[str, ...] = (
+    "summary",
+    "skills",
+    "competencies",
+    "experience",
+    "adaptability",
+    "services",
+)
+
+DEFAULT_SECTION_LABELS: Mapping = MappingProxyType({
+    "summary": "Professional Summary",
+    "skills": "Skills",
+    "competencies": "Core Competencies",
+    "experience": "Professional Experience",
+    "adaptability": "Adaptability to Emerging Trends",
+    "services": "Business Arcitecture and Business Analysis Services",
+})
+
+# Summary-only content for each section (derived from the user's resume)
+DEFAULT_SECTION_CONTENT: Mapping = MappingProxyType({
+    "summary": (
+        "- Seasoned **IT Business Analyst & Business Architect** with 15+ years of experience across finance, higher education, retail, and healthcare\n"
+        "- **TOGAF 9.1** & **ITIL V3** certified; skilled at aligning business and IT via "
+        "capability-based planning, process improvement, and Agile delivery."
+    ),
+    "skills": (
+        "- **Strategic & Leadership:** Enterprise Architecture (TOGAF), Business Capability Planning, Roadmaps, Business–IT Alignment, Team Leadership\n"
+        "- **Business Analysis:** Elicitation & Documentation (BRD, user stories, use cases), BPMN/CMMN/UML, Process Improvement, UAT Leadership, Solution Evaluation\n"
+        "- **Technical:** Identity & Access Management (IAM), SaaS/COTS configuration, SQL & data analysis, Systems Integration, ITSM (ITIL)\n"
+        "- **Tools & Methods:** Agile (Scrum/Kanban) & Waterfall, **Sparx EA**, **LeanIX**, **Jira**, **ServiceNow**, **Confluence**, **SharePoint**"
+    ),
+    "competencies": (
+        "- **Business Architecture & Analysis:** Capability/Information/Org mapping, strategic roadmaps, target operating models\n"
+        "- **Requirements & Design:** BABOK-aligned analysis, solution design definition, traceability\n"
+        "- **Solution Assessment & Validation:** Fit-gap, COTS/SaaS configuration, test strategy & UAT\n"
+        "- **Stakeholder Engagement:** Workshops/JAD, cross-functional facilitation, clear communication to executives\n"
+        "- **Agile Delivery & Improvement:** Iterative delivery, continuous improvement, change enablement"
+    ),
+    "experience": (
+        "**Highlights:**\n"
+        "- Led cloud **legal case management** implementation and UAT at **WorkSafeBC**.\n"
+        "- At **UBC**, built capability maps, value streams, and target-state roadmaps; defined last‑mile integrations for **Workday**.\n"
+        "- At **ICBC**, introduced **Business Capability Planning**; reduced document management TCO by ~55% (from $1.6M to $0.7M); delivered **Oracle IAM** integration.\n"
+        "- At **Safeway**, established **ITAM/SAM** practice; integrated HPAM, CMDB, Remedy, LDAP, Lawson; implemented Sun **IAM**, CA **ESP** scheduling, and Symantec Endpoint."
+    ),
+    "adaptability": (
+        "Continuously aligns BA practice with **emerging trends**: enterprise cloud, SaaS, "
+        "data-driven decisioning, automation, and architecture‑led transformation. "
+        "Active in IIBA/BizArch communities; rapidly adopts new tools & methods to drive measurable outcomes."
+    ),
+    "services": (
+        "**Business Architecture Services:**\n"
+        "- Developed comprehensive business architecture frameworks, including motivation models, governance models, and strategic roadmaps for organizations like Capilano University, BC Housing, and UBC, facilitating successful enterprise architecture practices and IT/business alignment.\n\n"
+        "**- Competency in:**\n"
+        "- Capability, Information & Organization Mapping\n"
+        "- Motivation, Benefits, As-Is and To-Be Target Operating Models\n"
+        "- Process Hierarchy Models\n"
+        "- Value Streams\n"
+        "- Strategic Roadmaps\n"
+        "- Business / IT Alignment maps\n"
+        "- Vision, Strategy, Objectives, and Measures Mapping\n"
+        "\n\n"
+        "**Business Analysis Services:**\n"
+        "- Led requirement gathering, analysis, and documentation efforts across various projects, including CRM upgrades at Vancity, case management solutions at WorksafeBC, and enterprise system implementations at UBC. Notable for crafting detailed business cases, process maps, and user stories to guide project execution. \n\n"
+        "**- Competency in:**\n"
+        "- Current state analysis and future state analysis documents \n"
+        "- Requirements Definition Document \n"
+        "- Epic, Feature and Stories\n"
+        "- Data Definition Requirements Document\n"
+        "- Gap Analysis Document \n"
+        "- Assistance with UAT Document\n"
+        "- Business Process Maps\n"
+        "- System deployment documents (i.e., deployment plan, service desk guide, etc.)\n"
+        "- Progress status reports\n"
+        "- Business cases\n"
+        "- Resource Estimations\n"
+    ),
+})
+
+
+# Seconds between checks of the resume file's modification time
+CONTENT_CHECK_INTERVAL = 1.0
+# Reloads stack a small search index layer each; past this depth it is rebuilt
+MAX_INDEX_LAYERS = 8
+
+logger = logging.getLogger("resume.content")
+
+
+def slugify(label: str) -> str:
+    """Create a safe key for sections based on label."""
+    return (
+        label.strip().lower()
+        .replace(" ", "_")
+        .replace("/", "_")
+        .replace("&", "and")
+        .replace("__", "_")
+    )
+
+
+class SectionKeyAllocator:
+    """Allocate unique section keys from labels in amortised constant time.
+
+    A per-slug counter remembers the next free suffix, so creating many
+    sections with the same label never rescans the suffixes already used.
+    """
+
+    def __init__(self, taken: Container):
+        self.taken = taken  # keys in use elsewhere, e.g. the session's section labels
+        self._issued: Set[str] = set()
+        self._next_suffix: Dict[str, int] = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self._issued or key in self.taken
+
+    def allocate(self, label: str) -> str:
+        base = key = slugify(label)
+        if key in self:
+            i = self._next_suffix.get(base, 2)
+            key = f"{base}_{i}"
+            while key in self:
+                i += 1
+                key = f"{base}_{i}"
+            self._next_suffix[base] = i + 1
+        self._issued.add(key)
+        return key
+
+
+def custom_section_content(label: str) -> str:
+    return f"Custom section **{label}**. Upload and attach artefacts here from the Job Artefacts page."
+
+
+# =============================
+# Resume File Loading
+# =============================
+class ResumeContent(NamedTuple):
+    order: Tuple[str, ...]
+    labels: Mapping
+    content: Mapping
+    version: int  # incremented on every reload that changed something
+    search_index: object  # SearchIndex over these sections
+
+
+def parse_resume_file(path: str) -> List[Tuple[str, str, str]]:
+    """Return the (key, label, content) sections of a JSON or YAML resume file."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError(f"{path}: reading YAML resume files requires PyYAML") from None
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    entries = data.get("sections") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a top-level \"sections\" list")
+    explicit = set()
+    for entry in entries:
+        if not isinstance(entry, dict) or not isinstance(entry.get("label"), str) or not entry["label"].strip():
+            raise ValueError(f"{path}: every section needs a non-empty \"label\"")
+        if entry.get("key"):
+            if entry["key"] in explicit:
+                raise ValueError(f"{path}: duplicate section key {entry['key']!r}")
+            explicit.add(entry["key"])
+    keys = SectionKeyAllocator(explicit)
+    return [
+        (entry.get("key") or keys.allocate(entry["label"]), entry["label"].strip(), str(entry.get("content") or ""))
+        for entry in entries
+    ]
+
+
+_NOT_LOADED = object()
+
+
+def _index_depth(index) -> int:
+    depth = 0
+    while index is not None:
+        depth, index = depth + 1, index.base
+    return depth
+
+
+class ResumeContentLoader:
+    """Resume sections from a file, re-parsed only when its modification time changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp: object = _NOT_LOADED
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._current: Optional[ResumeContent] = None
+
+    def current(self) -> ResumeContent:
+        now = time.monotonic()
+        if self._current is not None and now - self._checked_at < CONTENT_CHECK_INTERVAL:
+            return self._current
+        with self._lock:
+            if self._current is None or now - self._checked_at >= CONTENT_CHECK_INTERVAL:
+                self._checked_at = now
+                self._refresh()
+        return self._current
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+            stamp: object = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp:
+            return
+        self._stamp = stamp
+        if stamp is None:
+            sections = [(key, DEFAULT_SECTION_LABELS[key], DEFAULT_SECTION_CONTENT[key]) for key in DEFAULT_SECTION_ORDER]
+        else:
+            try:
+                sections = parse_resume_file(self.path)
+            except (OSError, ValueError) as exc:
+                logger.warning("Keeping the current resume content; %s could not be loaded: %s", self.path, exc)
+                if self._current is not None:
+                    return
+                sections = [(key, DEFAULT_SECTION_LABELS[key], DEFAULT_SECTION_CONTENT[key]) for key in DEFAULT_SECTION_ORDER]
+        self._current = self._build(sections, self._current)
+
+    def _build(self, sections: List[Tuple[str, str, str]], previous: Optional[ResumeContent]) -> ResumeContent:
+        from search import SearchIndex
+
+        order = tuple(key for key, _, _ in sections)
+        labels = {key: label for key, label, _ in sections}
+        content = {key: text for key, _, text in sections}
+        changed = [
+            key for key in order
+            if previous is None or previous.labels.get(key) != labels[key] or previous.content.get(key) != content[key]
+        ]
+        removed = [key for key in previous.order if key not in labels] if previous is not None else []
+        if previous is not None and not changed and not removed and order == previous.order:
+            return previous
+        if previous is None or len(changed) > len(order) // 2 or _index_depth(previous.search_index) >= MAX_INDEX_LAYERS:
+            index = SearchIndex()
+            indexed = order
+        else:
+            # Only the changed sections are indexed, in a layer over the previous index
+            index = SearchIndex(base=previous.search_index)
+            indexed = changed
+            for key in removed:
+                index.remove(f"section:{key}")
+        for key in indexed:
+            index.add(f"section:{key}", "section", key, labels[key], content[key])
+        if previous is not None:
+            logger.info("Reloaded resume content from %s: %d section(s) changed", self.path, len(changed))
+        return ResumeContent(
+            order, MappingProxyType(labels), MappingProxyType(content),
+            previous.version + 1 if previous is not None else 0, index,
+        )
+
+
+_loader: Optional[ResumeContentLoader] = None
+_loader_lock = threading.Lock()
+
+
+def resume_content() -> ResumeContent:
+    """Return the current resume sections, reloading the resume file if it changed."""
+    global _loader
+    if _loader is None:
+        with _loader_lock:
+            if _loader is None:
+                _loader = ResumeContentLoader(os.environ.get("RESUME_CONTENT_PATH", "resume.json"))
+    return _loader.current()
+
+
+# =============================
+# Per-Session Overlays
+# =============================
+class OverlayDict(MutableMapping):
+    """Dict view over a shared read-only base; writes and deletes stay local."""
+
+    def __init__(self, base: Mapping):
+        self.base = base
+        self.overlay: Dict[str, object] = {}
+        self.deleted: Set[str] = set()
+
+    def rebase(self, base: Mapping):
+        """Switch to a reloaded base, keeping this session's own writes."""
+        self.base = base
+        self.deleted &= set(base)
+
+    def __getitem__(self, key):
+        if key in self.overlay:
+            return self.overlay[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        return self.base[key]
+
+    def __setitem__(self, key, value):
+        self.overlay[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self.overlay.pop(key, None)
+        if key in self.base:
+            self.deleted.add(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.overlay or (key in self.base and key not in self.deleted)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self.deleted:
+                yield key
+        for key in self.overlay:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.base) - len(self.deleted) + sum(1 for key in self.overlay if key not in self.base)
+
+    def __repr__(self) -> str:
+        return f"OverlayDict({dict(self)!r})"
+
+
+class LayeredMapping(Mapping):
+    """Read-only mapping over dict layers, oldest first; later layers win, keys keep their first position."""
+
+    def __init__(self, layers: Sequence[Mapping], length: int):
+        self.layers = tuple(layers)
+        self.length = length  # distinct keys, tracked by the owner instead of counted
+
+    def __getitem__(self, key):
+        for layer in reversed(self.layers):
+            if key in layer:
+                return layer[key]
+        raise KeyError(key)
+
+    def __contains__(self, key) -> bool:
+        return any(key in layer for layer in self.layers)
+
+    def __iter__(self) -> Iterator[str]:
+        for i, layer in enumerate(self.layers):
+            for key in layer:
+                if not any(key in older for older in self.layers[:i]):
+                    yield key
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __repr__(self) -> str:
+        return f"LayeredMapping({dict(self)!r})"
+
+
+class OverlayList(Sequence):
+    """Append-only list whose leading items come from a shared read-only tuple."""
+
+    def __init__(self, base: Tuple[str, ...]):
+        self.base = base
+        self.appended: List[str] = []
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index < len(self.base):
+            return self.base[index]
+        return self.appended[index - len(self.base)]
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.appended)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.base
+        yield from self.appended
+
+    def __add__(self, other) -> List[str]:
+        return list(self) + list(other)
+
+    def append(self, key: str):
+        self.appended.append(key)
+
+    def rebase(self, base: Tuple[str, ...]):
+        """Switch to a reloaded base; appended keys it now contains are dropped."""
+        self.base = base
+        self.appended = [key for key in self.appended if key not in base]
+
+    def __repr__(self) -> str:
+        return f"OverlayList({list(self)!r})"
+
+
+def session_section_order(content: ResumeContent) -> OverlayList:
+    return OverlayList(content.order)
+
+
+def session_section_labels(content: ResumeContent) -> OverlayDict:
+    return OverlayDict(content.labels)
+
+
+def session_section_content(content: ResumeContent) -> OverlayDict:
+    return OverlayDict(content.content)
+
+
+def default_search_index():
+    """Return the process-wide search index over the resume sections."""
+    return resume_content().search_index
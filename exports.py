@@ -0,0 +1,419 @@
+import ctypes
+import hashlib
+import json
+import os
+import re
+import shutil
+import textwrap
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from artifact_store import get_artifact_store
+from blob_codecs import is_compressible
+from content import slugify
+from metrics import inc, observe
+
+# =============================
+# Resume Export Bundles
+# =============================
+# A visitor can download the resume together with its artefacts as a ZIP
+# (resume.md plus the original files, one folder per section) or as one PDF
+# (the sections typeset as pages, followed by the artefacts: PDFs page by
+# page, images scaled onto a page, text files as text). Bundles are built by
+# a background worker. A ZIP streams every artefact from the artifact store
+# into the output file, so no more than one chunk is in memory at a time.
+# pdfium keeps a PDF in memory until it is saved, so the single PDF has a
+# size budget: artefacts that would push it past RESUME_EXPORT_PDF_MAX_MB are
+# left out with a note pointing to the ZIP export. A bundle is named by a
+# hash of the section content and the artifact set, so exporting the same
+# resume again is served from disk; the least recently used bundles are
+# deleted once the directory outgrows RESUME_EXPORT_MAX_MB. A failed build's
+# error is kept for FAILED_EXPORT_SECONDS, long enough for the sessions
+# polling it to report it, and then pruned.
+#
+# Configuration (environment):
+#   RESUME_EXPORT_DIR          export directory (default <artifact dir>/exports)
+#   RESUME_EXPORT_WORKERS      background worker threads (default 1)
+#   RESUME_EXPORT_PDF_MAX_MB   embedded artefact bytes per single PDF (default 64)
+#   RESUME_EXPORT_MAX_MB       disk kept for built bundles (default 1024)
+
+EXPORT_FORMATS = {"zip": "application/zip", "pdf": "application/pdf"}
+EXPORT_NAME = re.compile(r"[0-9a-f]{64}\.(zip|pdf)")
+COPY_CHUNK_SIZE = 64 * 1024
+FAILED_EXPORT_SECONDS = 600
+PDF_MAX_BYTES = int(os.environ.get("RESUME_EXPORT_PDF_MAX_MB", "64")) * 1024 * 1024
+
+# PDF layout, in points on an A4 page
+PAGE_SIZE = (595, 842)
+MARGIN = 56
+TITLE_FONT_SIZE = 16
+BODY_FONT_SIZE = 10.5
+LINE_HEIGHT = 1.45
+# Average Helvetica glyph width as a fraction of the font size, for wrapping
+AVERAGE_CHAR_WIDTH = 0.5
+# Images are downscaled to this many pixels on their long side before embedding
+MAX_IMAGE_PIXELS = 2000
+TEXT_ARTIFACT_CHARS = 20_000
+# Characters outside the standard fonts' encoding, with printable stand-ins
+PDF_TEXT_REPLACEMENTS = str.maketrans({"\u2010": "-", "\u2011": "-", "\u202f": " ", "\u2009": " "})
+
+
+class ExportSection(NamedTuple):
+    key: str
+    label: str
+    content: str  # markdown
+
+
+class ExportArtifact(NamedTuple):
+    section_key: str
+    name: str
+    mime: str
+    digest: str
+
+
+class ExportSpec(NamedTuple):
+    fmt: str  # key of EXPORT_FORMATS
+    sections: Tuple[ExportSection, ...]
+    artifacts: Tuple[ExportArtifact, ...]
+
+    @property
+    def name(self) -> str:
+        """File name of the bundle: a hash of everything that goes into it."""
+        payload = json.dumps([self.fmt, self.sections, self.artifacts], ensure_ascii=False)
+        return f"{hashlib.sha256(payload.encode('utf-8')).hexdigest()}.{self.fmt}"
+
+
+class ExportStatus(NamedTuple):
+    state: str  # "pending", "ready" or "failed"
+    done: int = 0
+    total: int = 0
+    error: str = ""
+    finished: float = 0.0  # time.monotonic() when a build failed
+
+
+
+# =============================
+# ZIP Bundles
+# =============================
+def write_zip(spec: ExportSpec, path: str, on_progress):
+    store = get_artifact_store()
+    labels = {section.key: section.label for section in spec.sections}
+    with zipfile.ZipFile(path, "w") as bundle:
+        resume = "\n\n".join(f"# {section.label}\n\n{section.content}" for section in spec.sections)
+        bundle.writestr("resume.md", resume + "\n", compress_type=zipfile.ZIP_DEFLATED)
+        on_progress(1)
+        used = set()
+        for done, artifact in enumerate(spec.artifacts, start=2):
+            folder = archive_part(slugify(labels.get(artifact.section_key, artifact.section_key)), "artefacts")
+            arcname = unique_name(f"artefacts/{folder}/{archive_part(artifact.name, artifact.digest)}", used)
+            compress_type = zipfile.ZIP_DEFLATED if is_compressible(artifact.mime) else zipfile.ZIP_STORED
+            info = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+            info.compress_type = compress_type
+            # Copied in chunks from the store straight into the archive
+            with store.open(artifact.digest) as src, bundle.open(info, "w") as dst:
+                shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+            on_progress(done)
+
+
+def archive_part(name: str, fallback: str) -> str:
+    """Return name as a single path component that extracts inside its folder, else fallback."""
+    # Browsers on Windows may still send backslash-separated paths
+    part = "".join(ch for ch in name.replace("\\", "/").rsplit("/", 1)[-1] if ch >= " ").strip()
+    return fallback if part in ("", ".", "..") else part
+
+
+def unique_name(name: str, used: set) -> str:
+    stem, ext = os.path.splitext(name)
+    candidate, i = name, 2
+    # Case-insensitive, as archives are often extracted on case-insensitive file systems
+    while candidate.casefold() in used:
+        candidate = f"{stem} ({i}){ext}"
+        i += 1
+    used.add(candidate.casefold())
+    return candidate
+
+
+# =============================
+# PDF Bundles
+# =============================
+def markdown_lines(markdown_text: str) -> List[str]:
+    """Flatten section markdown into plain text lines for the PDF."""
+    lines = []
+    for line in markdown_text.splitlines():
+        line = line.replace("**", "").replace("__", "").rstrip()
+        stripped = line.lstrip()
+        if stripped.startswith(("- ", "* ")):
+            line = " " * (len(line) - len(stripped)) + "• " + stripped[2:]
+        lines.append(line.lstrip("#").strip() if stripped.startswith("#") else line)
+    return lines
+
+
+class PdfWriter:
+    """Typeset text pages into a new pdfium document, page by page.
+
+    The document lives in memory until save(), so embedded PDFs and images
+    are charged against max_bytes and refused (False) once it is spent.
+    """
+
+    def __init__(self, max_bytes: int = PDF_MAX_BYTES):
+        import pypdfium2 as pdfium
+
+        self.pdfium = pdfium
+        self.max_bytes = max_bytes
+        self.embedded_bytes = 0
+        self.pdf = pdfium.PdfDocument.new()
+        self.fonts = {
+            "body": pdfium.PdfFont.load_standard(self.pdf, "Helvetica"),
+            "title": pdfium.PdfFont.load_standard(self.pdf, "Helvetica-Bold"),
+        }
+        self.page = None
+        self.y = 0.0
+
+    def new_page(self):
+        self.finish_page()
+        self.page = self.pdf.new_page(*PAGE_SIZE)
+        self.y = PAGE_SIZE[1] - MARGIN
+
+    def finish_page(self):
+        if self.page is not None:
+            self.page.gen_content()
+            self.page.close()
+            self.page = None
+
+    def text(self, lines: Sequence[str], font: str = "body", size: float = BODY_FONT_SIZE):
+        width = int((PAGE_SIZE[0] - 2 * MARGIN) / (size * AVERAGE_CHAR_WIDTH))
+        for line in lines:
+            for wrapped in textwrap.wrap(line, width, subsequent_indent="  " if line.lstrip().startswith("•") else "") or [""]:
+                if self.page is None or self.y - size * LINE_HEIGHT < MARGIN:
+                    self.new_page()
+                self.y -= size * LINE_HEIGHT
+                self._draw(wrapped, MARGIN, self.y, font, size)
+
+    def _draw(self, text: str, x: float, y: float, font: str, size: float):
+        raw = self.pdfium.raw
+        obj = raw.FPDFPageObj_CreateTextObj(self.pdf, self.fonts[font], size)
+        encoded = (text.translate(PDF_TEXT_REPLACEMENTS) + "\0").encode("utf-16-le")
+        raw.FPDFText_SetText(obj, ctypes.cast(ctypes.create_string_buffer(encoded, len(encoded)), raw.FPDF_WIDESTRING))
+        raw.FPDFPageObj_Transform(obj, 1, 0, 0, 1, x, y)
+        raw.FPDFPage_InsertObject(self.page, obj)
+
+    def _charge(self, size: int) -> bool:
+        if self.embedded_bytes + size > self.max_bytes:
+            return False
+        self.embedded_bytes += size
+        return True
+
+    def image(self, stream, title: str) -> bool:
+        """Place an image on its own page, scaled to fit below its title; False if over budget."""
+        from PIL import Image
+
+        with Image.open(stream) as image:
+            # The header gives the size, so an image over budget is never decoded
+            scale = min(MAX_IMAGE_PIXELS / max(image.size), 1.0)
+            if not self._charge(round(image.width * scale) * round(image.height * scale) * 3):
+                return False
+            image.thumbnail((MAX_IMAGE_PIXELS, MAX_IMAGE_PIXELS))
+            bitmap = self.pdfium.PdfBitmap.from_pil(image.convert("RGB"))
+        self.new_page()
+        self.text([title], "title", TITLE_FONT_SIZE)
+        box_w, box_h = PAGE_SIZE[0] - 2 * MARGIN, self.y - MARGIN - BODY_FONT_SIZE
+        scale = min(box_w / bitmap.width, box_h / bitmap.height, 1.0)
+        w, h = bitmap.width * scale, bitmap.height * scale
+        pdf_image = self.pdfium.PdfImage.new(self.pdf)
+        pdf_image.set_bitmap(bitmap)
+        pdf_image.set_matrix(self.pdfium.PdfMatrix().scale(w, h).translate(MARGIN, self.y - BODY_FONT_SIZE - h))
+        self.page.insert_obj(pdf_image)
+        self.finish_page()
+        bitmap.close()
+        return True
+
+    def import_pdf(self, stream, size: int) -> bool:
+        """Append the pages of a size-byte PDF; False if over budget."""
+        if not self._charge(size):
+            return False
+        source = self.pdfium.PdfDocument(stream)
+        try:
+            self.finish_page()
+            self.pdf.import_pages(source)
+        finally:
+            source.close()
+        return True
+
+    def save(self, path: str):
+        self.finish_page()
+        with open(path, "wb") as f:
+            self.pdf.save(f)
+        self.pdf.close()
+
+
+def write_pdf(spec: ExportSpec, path: str, on_progress):
+    from previews import _pdfium_lock, extract_text
+
+    store = get_artifact_store()
+    # pdfium is not thread-safe; the lock is taken per step so previews and
+    # page renders can interleave with a long export
+    with _pdfium_lock:
+        writer = PdfWriter()
+        for section in spec.sections:
+            writer.new_page()
+            writer.text([section.label, ""], "title", TITLE_FONT_SIZE)
+            writer.text(markdown_lines(section.content))
+    on_progress(1)
+    for done, artifact in enumerate(spec.artifacts, start=2):
+        title = f"{artifact.name} ({artifact.mime})"
+        try:
+            with store.open(artifact.digest) as stream:
+                if artifact.mime == "application/pdf":
+                    with _pdfium_lock:
+                        included = writer.import_pdf(stream, store.size(artifact.digest))
+                elif artifact.mime.startswith("image/") and artifact.mime != "image/svg+xml":
+                    with _pdfium_lock:
+                        included = writer.image(stream, title)
+                else:
+                    included = True
+                    text = extract_text(stream, artifact.mime, TEXT_ARTIFACT_CHARS)
+                    lines = text.splitlines() or ["This file type cannot be shown in a PDF; export a ZIP to include it."]
+                    with _pdfium_lock:
+                        writer.new_page()
+                        writer.text([title, ""], "title", TITLE_FONT_SIZE)
+                        writer.text(lines)
+            if not included:
+                with _pdfium_lock:
+                    writer.new_page()
+                    writer.text([title, ""], "title", TITLE_FONT_SIZE)
+                    writer.text([
+                        f"Left out: this PDF bundle embeds at most {writer.max_bytes // (1024 * 1024)} MB of artefacts."
+                        " Export a ZIP to include every file."
+                    ])
+        except Exception as exc:
+            # One undecodable artefact should not fail the whole bundle
+            with _pdfium_lock:
+                writer.new_page()
+                writer.text([title, ""], "title", TITLE_FONT_SIZE)
+                writer.text([f"This file could not be included: {exc}"])
+        on_progress(done)
+    with _pdfium_lock:
+        writer.save(path)
+
+
+WRITERS = {"zip": write_zip, "pdf": write_pdf}
+
+
+# =============================
+# Export Service
+# =============================
+class ExportService:
+    """Build export bundles in the background, at most once per content hash."""
+
+    def __init__(self, root: str, workers: int = 1, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._jobs: Dict[str, ExportStatus] = {}
+        self._lock = threading.Lock()
+        self.prune()
+
+    def path_for(self, name: str) -> Optional[str]:
+        return os.path.join(self.root, name) if EXPORT_NAME.fullmatch(name) else None
+
+    def submit(self, spec: ExportSpec) -> str:
+        """Queue a bundle unless it is already built or in flight; return its name."""
+        name = spec.name
+        if self.touch(name):
+            inc("export_cache_hits", format=spec.fmt)
+            return name
+        with self._lock:
+            if self._jobs.get(name, ExportStatus("failed")).state == "failed":
+                self._jobs[name] = ExportStatus("pending", 0, len(spec.artifacts) + 1)
+                self._executor.submit(self._build, spec, name)
+        return name
+
+    def status(self, name: str) -> Optional[ExportStatus]:
+        """Return the state of a bundle, or None if it was never requested."""
+        path = self.path_for(name)
+        if path is not None and os.path.exists(path):
+            return ExportStatus("ready")
+        return self._jobs.get(name)
+
+    def touch(self, name: str) -> bool:
+        """Mark a built bundle as just used (its access time orders pruning); False if it does not exist."""
+        path = self.path_for(name)
+        try:
+            # mtime stays put: the asset server sends it as Last-Modified
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except (OSError, TypeError):
+            return False
+        return True
+
+    def prune(self, keep: Optional[str] = None):
+        """Delete the least recently used bundles until the directory fits max_bytes, and expired failures."""
+        expired = time.monotonic() - FAILED_EXPORT_SECONDS
+        with self._lock:
+            for name in [name for name, job in self._jobs.items() if job.state == "failed" and job.finished < expired]:
+                del self._jobs[name]
+        bundles = []
+        for entry in os.scandir(self.root):
+            if EXPORT_NAME.fullmatch(entry.name) and entry.name != keep:
+                stat = entry.stat()
+                bundles.append((stat.st_atime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in bundles)
+        if keep is not None and os.path.exists(self.path_for(keep)):
+            total += os.path.getsize(self.path_for(keep))
+        for _, size, path in sorted(bundles):
+            if total <= self.max_bytes:
+                break
+            try:
+                # A download in progress keeps reading its open file
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            inc("export_pruned")
+
+    def _build(self, spec: ExportSpec, name: str):
+        path = self.path_for(name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        total = len(spec.artifacts) + 1
+
+        def on_progress(done: int):
+            self._jobs[name] = ExportStatus("pending", done, total)
+
+        started = time.perf_counter()
+        try:
+            WRITERS[spec.fmt](spec, tmp_path, on_progress)
+            os.replace(tmp_path, path)
+        except Exception as exc:
+            self._jobs[name] = ExportStatus("failed", 0, total, str(exc), time.monotonic())
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            self.prune()
+            return
+        observe("export_build", time.perf_counter() - started, format=spec.fmt)
+        with self._lock:
+            self._jobs.pop(name, None)
+        self.prune(keep=name)
+
+
+_export_service: Optional[ExportService] = None
+_export_service_lock = threading.Lock()
+
+
+def get_export_service() -> ExportService:
+    """Return the process-wide export service."""
+    global _export_service
+    if _export_service is None:
+        with _export_service_lock:
+            if _export_service is None:
+                root = os.environ.get("RESUME_EXPORT_DIR") or os.path.join(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "exports"
+                )
+                _export_service = ExportService(
+                    root,
+                    int(os.environ.get("RESUME_EXPORT_WORKERS", "1")),
+                    int(os.environ.get("RESUME_EXPORT_MAX_MB", "1024")) * 1024 * 1024,
+                )
+    return _export_service
@@ -0,0 +1,194 @@
+import html
+import io
+import json
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# =============================
+# Responsive Image Variants
+# =============================
+# Every source image (Infograph.jpg, uploaded images) is resized once to a
+# ladder of widths and encoded as WebP plus a JPEG fallback. The variants are
+# written to disk under a key derived from the source content, served by the
+# asset server under /variants/<key>/<width>.<format> and referenced from a
+# <picture> element whose srcset lets the browser fetch the smallest variant
+# that covers its layout width and pixel density.
+#
+# Configuration (environment):
+#   RESUME_VARIANT_DIR      variant directory (default <artifact dir>/variants)
+#   RESUME_VARIANT_WORKERS  background worker threads (default 2)
+
+VARIANT_WIDTHS = (320, 480, 640, 960, 1280)
+# format -> (PIL format, MIME type, quality); listed in order of preference
+VARIANT_FORMATS = {
+    "webp": ("WEBP", "image/webp", 80),
+    "jpeg": ("JPEG", "image/jpeg", 82),
+}
+MANIFEST_NAME = "variants.json"
+# Content digest (or file ETag), optionally suffixed with the target box
+VARIANT_KEY = re.compile(r"[0-9a-f]{32,64}(-\d+x\d+)?")
+VARIANT_NAME = re.compile(r"\d+\.(webp|jpeg)")
+
+
+class ImageVariant(NamedTuple):
+    width: int
+    height: int
+    fmt: str  # key of VARIANT_FORMATS
+
+    @property
+    def name(self) -> str:
+        return f"{self.width}.{self.fmt}"
+
+    @property
+    def mime(self) -> str:
+        return VARIANT_FORMATS[self.fmt][1]
+
+
+def variant_widths(source_width: int) -> List[int]:
+    """Widths to generate for a source, never upscaling past its own width."""
+    widths = [width for width in VARIANT_WIDTHS if width < source_width]
+    widths.append(min(source_width, VARIANT_WIDTHS[-1]))
+    return widths
+
+
+def encode_variants(source: BinaryIO, box: Optional[Tuple[int, int]] = None) -> Dict[ImageVariant, bytes]:
+    """Resize source to every variant width; box fixes the aspect ratio (default: the source's)."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.load()
+        ratio = (box[1] / box[0]) if box else (image.height / image.width)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        encoded: Dict[ImageVariant, bytes] = {}
+        for width in variant_widths(image.width):
+            height = max(1, round(width * ratio))
+            resized = image.resize((width, height), Image.LANCZOS)
+            for fmt, (pil_format, _, quality) in VARIANT_FORMATS.items():
+                buffer = io.BytesIO()
+                resized.save(buffer, format=pil_format, quality=quality, optimize=fmt == "jpeg")
+                encoded[ImageVariant(width, height, fmt)] = buffer.getvalue()
+    return encoded
+
+
+def picture_html(
+    variants: Sequence[ImageVariant],
+    url_for: Callable[[ImageVariant], str],
+    alt: str,
+    sizes: str,
+    display_width: Optional[int] = None,
+) -> str:
+    """Return a <picture> offering every format as a width-described srcset."""
+    sources = []
+    fallback = ""
+    for fmt, (_, mime, _) in VARIANT_FORMATS.items():
+        ladder = sorted((v for v in variants if v.fmt == fmt), key=lambda v: v.width)
+        if not ladder:
+            continue
+        srcset = ", ".join(f"{html.escape(url_for(v))} {v.width}w" for v in ladder)
+        if fmt == "jpeg":
+            width = min(display_width or ladder[-1].width, ladder[-1].width)
+            height = round(width * ladder[-1].height / ladder[-1].width)
+            # For clients without srcset support: the first variant covering the layout width
+            src = next((v for v in ladder if v.width >= width), ladder[-1])
+            fallback = (
+                f'<img src="{html.escape(url_for(src))}" srcset="{srcset}" sizes="{html.escape(sizes)}" '
+                f'width="{width}" height="{height}" alt="{html.escape(alt)}" '
+                'loading="lazy" decoding="async" style="max-width:100%;height:auto">'
+            )
+        else:
+            sources.append(f'<source type="{mime}" srcset="{srcset}" sizes="{html.escape(sizes)}">')
+    return f"<picture>{''.join(sources)}{fallback}</picture>"
+
+
+class VariantStore:
+    """Generate variants once per key and keep their manifests in memory."""
+
+    def __init__(self, root: str, workers: int = 2):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self._manifests: Dict[str, List[ImageVariant]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="variants")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, key: str, name: str) -> Optional[str]:
+        if not VARIANT_KEY.fullmatch(key) or not VARIANT_NAME.fullmatch(name):
+            return None
+        return os.path.join(self.root, key[:2], key, name)
+
+    def get(self, key: str) -> Optional[List[ImageVariant]]:
+        """Return the variants of key ([] if the source was not decodable), or None if not generated."""
+        variants = self._manifests.get(key)
+        if variants is None and VARIANT_KEY.fullmatch(key):
+            try:
+                with open(os.path.join(self.root, key[:2], key, MANIFEST_NAME)) as f:
+                    variants = [ImageVariant(*entry) for entry in json.load(f)]
+            except FileNotFoundError:
+                return None
+            self._manifests[key] = variants
+        return variants
+
+    def ensure(self, key: str, open_source: Callable[[], BinaryIO], box: Optional[Tuple[int, int]] = None) -> List[ImageVariant]:
+        """Return the variants of key, waiting for their generation if needed."""
+        future = self.submit(key, open_source, box)
+        return self.get(key) if future is None else future.result()
+
+    def submit(self, key: str, open_source: Callable[[], BinaryIO], box: Optional[Tuple[int, int]] = None) -> Optional[Future]:
+        """Queue variant generation unless it already exists or is in flight."""
+        if self.get(key) is not None:
+            return None
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                future = self._pending[key] = self._executor.submit(self._generate, key, open_source, box)
+            return future
+
+    def _generate(self, key: str, open_source: Callable[[], BinaryIO], box: Optional[Tuple[int, int]]) -> List[ImageVariant]:
+        directory = os.path.join(self.root, key[:2], key)
+        try:
+            try:
+                with open_source() as source:
+                    encoded = encode_variants(source, box)
+            except Exception:
+                # Undecodable image: an empty manifest stops it being retried
+                encoded = {}
+            os.makedirs(directory, exist_ok=True)
+            for variant, data in encoded.items():
+                with open(os.path.join(directory, variant.name), "wb") as f:
+                    f.write(data)
+            variants = list(encoded)
+            # The manifest is written last, so readers never see partial variants
+            tmp_path = os.path.join(directory, f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump([list(v) for v in variants], f)
+            os.replace(tmp_path, os.path.join(directory, MANIFEST_NAME))
+            self._manifests[key] = variants
+            return variants
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+
+def is_variant_source(mime: str) -> bool:
+    return mime in ("image/jpeg", "image/png", "image/webp", "image/gif", "image/bmp", "image/tiff")
+
+
+_variant_store: Optional[VariantStore] = None
+_variant_store_lock = threading.Lock()
+
+
+def get_variant_store() -> VariantStore:
+    """Return the process-wide variant store."""
+    global _variant_store
+    if _variant_store is None:
+        with _variant_store_lock:
+            if _variant_store is None:
+                root = os.environ.get("RESUME_VARIANT_DIR") or os.path.join(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "variants"
+                )
+                _variant_store = VariantStore(root, int(os.environ.get("RESUME_VARIANT_WORKERS", "2")))
+    return _variant_store
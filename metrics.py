@@ -0,0 +1,183 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+# =============================
+# Hot-Path Metrics
+# =============================
+# Timers and counters around the rerun hot path (init_state, render_sidebar,
+# show_section_page, add_artifact, asset loads). When disabled, timed()
+# returns the wrapped function unchanged and timer()/inc()/set_gauge() return
+# immediately, so the hooks cost close to nothing.
+#
+# Configuration (environment):
+#   RESUME_METRICS      "1" to enable collection (default off)
+#   RESUME_METRICS_LOG  "1" to also log one JSON line per rerun on the
+#                       "resume.metrics" logger
+#
+# When enabled, a Prometheus text snapshot is served at /metrics on the asset
+# server (if RESUME_ASSET_BASE_URL enables it) and prometheus_text()/snapshot()
+# return the same data in-process.
+
+ENABLED = os.environ.get("RESUME_METRICS", "").lower() in ("1", "true", "on")
+LOG_RERUNS = ENABLED and os.environ.get("RESUME_METRICS_LOG", "").lower() in ("1", "true", "on")
+PREFIX = "resume_"
+# Histogram bucket upper bounds in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+logger = logging.getLogger("resume.metrics")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, Labels], float] = {}
+_gauges: Dict[Tuple[str, Labels], float] = {}
+# (name, labels) -> [bucket counts..., +Inf count, sum]
+_histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    if not ENABLED:
+        return
+    with _lock:
+        _gauges[(name, _labels(labels))] = value
+
+
+def observe(name: str, seconds: float, **labels):
+    if not ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0.0] * (len(BUCKETS) + 2)
+        histogram[bisect_left(BUCKETS, seconds)] += 1
+        histogram[-1] += seconds
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str, **labels):
+    """Context manager recording the duration of its block as name_seconds."""
+    return _Timer(name, labels) if ENABLED else _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """Decorator recording each call's duration; a no-op when metrics are disabled."""
+    def decorate(fn: Callable) -> Callable:
+        if not ENABLED:
+            return fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe(name, time.perf_counter() - started)
+        return wrapper
+    return decorate
+
+
+def log_rerun(**fields):
+    """Emit one structured JSON line describing a finished rerun."""
+    if LOG_RERUNS:
+        logger.info(json.dumps({"event": "rerun", "ts": time.time(), **fields}, sort_keys=True))
+
+
+def snapshot() -> dict:
+    """Return all metrics as a JSON-serialisable dict."""
+    def rows(store: Dict[Tuple[str, Labels], float]) -> List[dict]:
+        return [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in sorted(store.items())]
+
+    with _lock:
+        histograms = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "count": sum(values[:-1]),
+                "sum": values[-1],
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], values[:-1])),
+            }
+            for (name, labels), values in sorted(_histograms.items())
+        ]
+        return {"enabled": ENABLED, "counters": rows(_counters), "gauges": rows(_gauges), "timers": histograms}
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    with _lock:
+        for kind, store, suffix in (("counter", _counters, "_total"), ("gauge", _gauges, "")):
+            for name in sorted({name for name, _ in store}):
+                lines.append(f"# TYPE {PREFIX}{name}{suffix} {kind}")
+                for (metric, labels), value in sorted(store.items()):
+                    if metric == name:
+                        lines.append(f"{PREFIX}{name}{suffix}{_format_labels(labels)} {value:g}")
+        for name in sorted({name for name, _ in _histograms}):
+            lines.append(f"# TYPE {PREFIX}{name}_seconds histogram")
+            for (metric, labels), values in sorted(_histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0.0
+                for bound, count in zip([f"{b:g}" for b in BUCKETS] + ["+Inf"], values[:-1]):
+                    cumulative += count
+                    lines.append(f"{PREFIX}{name}_seconds_bucket{_format_labels(labels, (('le', bound),))} {cumulative:g}")
+                lines.append(f"{PREFIX}{name}_seconds_sum{_format_labels(labels)} {values[-1]:g}")
+                lines.append(f"{PREFIX}{name}_seconds_count{_format_labels(labels)} {cumulative:g}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,258 @@
+import io
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from artifact_store import BlobCache
+from metrics import inc, observe
+
+# =============================
+# Lazy PDF Page Rendering
+# =============================
+# Instead of shipping a whole PDF to the browser's plugin, registered PDFs are
+# rasterized one page at a time, at the zoom level the viewer asks for, and
+# served by the asset server under /pdf-pages/<etag>/<page>/<scale>.jpg. A
+# rendered page is cached by (file hash, page, scale) in memory and on disk,
+# and the page after it is rendered in the background so scrolling on does
+# not wait for pdfium.
+#
+# Configuration (environment):
+#   RESUME_PDF_PAGE_DIR       page cache directory (default <artifact dir>/pdf_pages)
+#   RESUME_PDF_PAGE_CACHE_MB  in-memory budget in MiB (default 32)
+
+# Render scales are whole percentages in this range and step, so the cache
+# key space stays bounded whatever zoom and pixel density a client reports
+MIN_SCALE_PERCENT = 25
+MAX_SCALE_PERCENT = 400
+SCALE_STEP_PERCENT = 25
+JPEG_QUALITY = 85
+PAGE_NAME = re.compile(r"(\d+)/(\d+)\.jpg")
+ETAG = re.compile(r"[0-9a-f]{32}")
+
+
+class PdfInfo(NamedTuple):
+    etag: str
+    page_sizes: List[Tuple[float, float]]  # (width, height) in PDF points at 100%
+
+
+def valid_scale(percent: int) -> bool:
+    return MIN_SCALE_PERCENT <= percent <= MAX_SCALE_PERCENT and percent % SCALE_STEP_PERCENT == 0
+
+
+# Zoom levels offered by the viewer, in percent of the PDF's own size
+VIEWER_ZOOM_LEVELS = (50, 75, 100, 125, 150, 200)
+VIEWER_TEMPLATE = """
+<div class="pdf-viewer">
+  <div class="toolbar">
+    <button data-zoom="-1" title="Zoom out">&minus;</button>
+    <span class="zoom"></span>
+    <button data-zoom="1" title="Zoom in">+</button>
+    <span class="pages"></span>
+  </div>
+  <div class="pages-list"></div>
+</div>
+<style>
+  .pdf-viewer {{ font-family: sans-serif; }}
+  .pdf-viewer .toolbar {{ position: sticky; top: 0; z-index: 1; background: #fff; padding: 4px 0; }}
+  .pdf-viewer .toolbar span {{ margin: 0 8px; }}
+  .pdf-viewer .page {{ margin: 0 auto 12px; max-width: 100%; background: #f3f3f3; box-shadow: 0 1px 3px #0003; }}
+  .pdf-viewer .page img {{ display: block; width: 100%; height: 100%; }}
+</style>
+<script>
+(function () {{
+  const base = {base}, sizes = {sizes}, levels = {levels};
+  let zoom = {zoom};
+  const list = document.querySelector(".pdf-viewer .pages-list");
+  const label = document.querySelector(".pdf-viewer .zoom");
+  document.querySelector(".pdf-viewer .pages").textContent = sizes.length + (sizes.length === 1 ? " page" : " pages");
+  // Rasterize at the zoom times the screen's pixel density, snapped to the server's scale steps
+  const renderScale = () => Math.min({max_scale}, Math.max({min_scale},
+    Math.round(zoom * (window.devicePixelRatio || 1) / {step}) * {step}));
+  const pages = sizes.map(([w, h], i) => {{
+    const page = document.createElement("div");
+    page.className = "page";
+    page.dataset.index = i;
+    page.style.aspectRatio = w + " / " + h;
+    const img = document.createElement("img");
+    img.alt = "Page " + (i + 1);
+    page.appendChild(img);
+    list.appendChild(page);
+    return page;
+  }});
+  // Only pages that scroll into view are requested, plus the one after each
+  const load = (i) => {{
+    if (i >= pages.length) return;
+    const url = base + "/" + i + "/" + renderScale() + ".jpg";
+    const img = pages[i].firstChild;
+    if (img.getAttribute("src") !== url) img.src = url;
+  }};
+  const visible = new Set();
+  const observer = new IntersectionObserver((entries) => {{
+    for (const entry of entries) {{
+      const i = Number(entry.target.dataset.index);
+      if (entry.isIntersecting) {{ visible.add(i); load(i); load(i + 1); }} else {{ visible.delete(i); }}
+    }}
+  }});
+  const layout = () => {{
+    label.textContent = zoom + "%";
+    pages.forEach((page, i) => {{ page.style.width = (sizes[i][0] * zoom / 100) + "px"; }});
+    visible.forEach((i) => {{ load(i); load(i + 1); }});
+  }};
+  document.querySelectorAll(".pdf-viewer [data-zoom]").forEach((button) => {{
+    button.addEventListener("click", () => {{
+      const next = levels.indexOf(zoom) + Number(button.dataset.zoom);
+      if (next >= 0 && next < levels.length) {{ zoom = levels[next]; layout(); }}
+    }});
+  }});
+  layout();
+  pages.forEach((page) => observer.observe(page));
+}})();
+</script>
+"""
+
+
+def viewer_html(info: PdfInfo, pages_url: str, zoom: int = 100) -> str:
+    """Return a self-contained viewer that loads info's pages from pages_url as they scroll into view."""
+    return VIEWER_TEMPLATE.format(
+        # Inside <script>, so only a closing tag could break out of the string
+        base=json.dumps(pages_url).replace("</", "<\\/"),
+        sizes=json.dumps([[round(w, 2), round(h, 2)] for w, h in info.page_sizes]),
+        levels=json.dumps(VIEWER_ZOOM_LEVELS),
+        zoom=zoom,
+        min_scale=MIN_SCALE_PERCENT,
+        max_scale=MAX_SCALE_PERCENT,
+        step=SCALE_STEP_PERCENT,
+    )
+
+
+class PdfPageStore:
+    """Render pages of registered PDFs on demand and cache them per (etag, page, scale)."""
+
+    def __init__(self, root: str, cache_bytes: int, workers: int = 1):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.cache = BlobCache(cache_bytes, name="pdf_page")
+        self._sources: Dict[str, str] = {}
+        self._infos: Dict[str, PdfInfo] = {}
+        # pdfium calls are serialised anyway; more threads would only queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-page")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def register(self, path: str) -> Optional[PdfInfo]:
+        """Make path's pages servable; return its etag and page sizes, or None if unreadable."""
+        from asset_server import file_etag
+        from assets import file_version
+        from previews import _pdfium_lock
+
+        version = file_version(path)
+        if version is None:
+            return None
+        etag = file_etag(path, version)
+        info = self._infos.get(etag)
+        if info is None:
+            import pypdfium2 as pdfium
+
+            try:
+                with _pdfium_lock:
+                    pdf = pdfium.PdfDocument(path)
+                    try:
+                        sizes = [pdf.get_page_size(i) for i in range(len(pdf))]
+                    finally:
+                        pdf.close()
+            except pdfium.PdfiumError:
+                return None
+            info = self._infos[etag] = PdfInfo(etag, sizes)
+        self._sources[etag] = os.path.abspath(path)
+        return info
+
+    def path_for(self, etag: str, name: str) -> Optional[str]:
+        """Return the cache file of /pdf-pages/<etag>/<name>, or None if it is not a valid page."""
+        match = PAGE_NAME.fullmatch(name)
+        info = self._infos.get(etag) if ETAG.fullmatch(etag) else None
+        if match is None or info is None:
+            return None
+        page, percent = int(match.group(1)), int(match.group(2))
+        if not 0 <= page < len(info.page_sizes) or not valid_scale(percent):
+            return None
+        return os.path.join(self.root, etag, f"{page}-{percent}.jpg")
+
+    def page(self, etag: str, name: str) -> Optional[bytes]:
+        """Return the JPEG of a page, rendering it if needed, and queue the next one."""
+        path = self.path_for(etag, name)
+        if path is None:
+            return None
+        data = self.cache.get(path)
+        if data is None:
+            future = self._submit(etag, path)
+            data = self._read(path) if future is None else future.result()
+            self.cache.put(path, data)
+        page, percent = (int(part) for part in PAGE_NAME.fullmatch(name).groups())
+        if page + 1 < len(self._infos[etag].page_sizes):
+            self._submit(etag, self.path_for(etag, f"{page + 1}/{percent}.jpg"))
+        return data
+
+    def _read(self, path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    def _submit(self, etag: str, path: str) -> Optional[Future]:
+        if os.path.exists(path):
+            return None
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None:
+                future = self._pending[path] = self._executor.submit(self._render, etag, path)
+            return future
+
+    def _render(self, etag: str, path: str) -> bytes:
+        import pypdfium2 as pdfium
+        from previews import _pdfium_lock
+
+        try:
+            page_index, percent = (int(part) for part in os.path.basename(path)[:-len(".jpg")].split("-"))
+            started = time.perf_counter()
+            with _pdfium_lock:
+                pdf = pdfium.PdfDocument(self._sources[etag])
+                try:
+                    page = pdf[page_index]
+                    image = page.render(scale=percent / 100).to_pil()
+                    page.close()
+                finally:
+                    pdf.close()
+            buffer = io.BytesIO()
+            image.convert("RGB").save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+            data = buffer.getvalue()
+            observe("pdf_page_render", time.perf_counter() - started, scale=str(percent))
+            inc("pdf_pages_rendered")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            return data
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+
+_pdf_page_store: Optional[PdfPageStore] = None
+_pdf_page_store_lock = threading.Lock()
+
+
+def get_pdf_page_store() -> PdfPageStore:
+    """Return the process-wide PDF page store."""
+    global _pdf_page_store
+    if _pdf_page_store is None:
+        with _pdf_page_store_lock:
+            if _pdf_page_store is None:
+                root = os.environ.get("RESUME_PDF_PAGE_DIR") or os.path.join(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "pdf_pages"
+                )
+                cache_bytes = int(os.environ.get("RESUME_PDF_PAGE_CACHE_MB", "32")) * 1024 * 1024
+                _pdf_page_store = PdfPageStore(root, cache_bytes)
+    return _pdf_page_store
@@ -0,0 +1,387 @@
+import atexit
+import copy
+import json
+import os
+import queue
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
+
+from artifact_index import ArtifactIndex
+from content import LayeredMapping
+from search import SearchIndex
+from text_store import get_text_store
+
+# =============================
+# Durable State (SQLite)
+# =============================
+# Custom sections and artifact metadata outlive restarts and are shared by
+# every session and every app worker process through one SQLite file in WAL
+# mode. Artifact writes from add_artifact are queued and committed in batches
+# by a background thread; new sections are committed synchronously, because
+# their keys must not collide with a section another session stored under
+# the same label. Payloads stay in the artifact store; only metadata records
+# (with their content digest) are kept here.
+#
+# Sessions do not query the database themselves: each process keeps one
+# snapshot of the namespace (records, artifact indexes and a search layer
+# with the artifacts' extracted text) that new sessions share. A snapshot is
+# refreshed only when the namespace's write counter moved, and then reads
+# just the rows written since with one indexed query. Those rows become a new
+# layer over the previous snapshot's (metadata, artifact index and search
+# index alike), so a refresh costs what changed, not what is stored. A layer
+# is folded into the one below while that is at most twice its size, which
+# keeps the stack O(log n) deep and merges each row O(log n) times, without
+# reading extracted texts again.
+#
+# Configuration (environment):
+#   RESUME_DB_PATH       SQLite file (default <artifact dir>/resume.sqlite3, "" disables)
+#   RESUME_DB_NAMESPACE  logical resume to load/save (default "default")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    namespace TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL,
+    PRIMARY KEY (namespace, kind, key)
+);
+CREATE TABLE IF NOT EXISTS namespaces (
+    namespace TEXT PRIMARY KEY,
+    seq INTEGER NOT NULL,
+    version INTEGER NOT NULL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS records_by_namespace_seq ON records (namespace, seq);
+CREATE INDEX IF NOT EXISTS records_by_namespace_version ON records (namespace, version);
+"""
+
+# seq orders records by creation; version is the write transaction that last touched them
+UPSERT = """
+INSERT INTO records (namespace, kind, key, seq, version, data) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (namespace, kind, key) DO UPDATE SET data = excluded.data, version = excluded.version
+"""
+
+INSERT_NEW = """
+INSERT INTO records (namespace, kind, key, seq, version, data) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (namespace, kind, key) DO NOTHING
+"""
+
+FLUSH_INTERVAL_SECONDS = 0.2
+MAX_BATCH = 500
+
+
+class PersistedState(NamedTuple):
+    sections: Mapping[str, Tuple[str, str]]  # key -> (label, content), in creation order
+    artifacts: Mapping[str, dict]  # artifact_id -> metadata, in creation order; never mutated
+    artifacts_by_section: Mapping[str, Tuple[str, ...]]
+    artifact_index: ArtifactIndex  # shared and never mutated: sessions layer their own over it
+    artifact_bytes: int
+    search_index: SearchIndex  # sections and artifact texts, layered over the resume's index
+    unfinished: FrozenSet[str]  # artifact ids whose processing is queued or running
+    version: int  # namespace write counter this snapshot reflects
+
+
+class SnapshotLayer(NamedTuple):
+    artifacts: Dict[str, dict]  # rows written in this layer
+    artifact_index: ArtifactIndex  # artifacts new in this layer, over the layer below's
+    search_index: SearchIndex  # documents written in this layer, over the layer below's
+
+
+class StateStore:
+    """Batched writer and shared, incrementally refreshed snapshot for one namespace."""
+
+    def __init__(self, path: str, namespace: str = "default"):
+        self.path = path
+        self.namespace = namespace
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            # Files written before records carried a version
+            if "version" not in {row[1] for row in conn.execute("PRAGMA table_info(records)")}:
+                conn.execute("ALTER TABLE records ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.executescript(INDEXES)
+        finally:
+            conn.close()
+        self._snapshot: Optional[PersistedState] = None
+        self._layers: List[SnapshotLayer] = []  # the snapshot's layers, oldest first
+        self._snapshot_lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, str, str]]]" = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="state-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Writes
+    def _commit(self, conn: sqlite3.Connection, write: Callable[[Callable[[str, str, str, str], bool]], None]):
+        """Run write(put) in one transaction; put(statement, kind, key, data) returns False if nothing was written."""
+        # IMMEDIATE: take the write lock before reading the namespace counter
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT seq, version FROM namespaces WHERE namespace = ?", (self.namespace,)).fetchone()
+            if row is None:
+                # First write since the counter row was introduced, or to a new namespace
+                seq = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM records WHERE namespace = ?", (self.namespace,)
+                ).fetchone()[0]
+                version = 0
+                conn.execute("INSERT INTO namespaces (namespace, seq, version) VALUES (?, ?, ?)", (self.namespace, seq, 0))
+            else:
+                seq, version = row
+            counter = [seq, version + 1]
+
+            def put(statement: str, kind: str, key: str, data: str) -> bool:
+                counter[0] += 1
+                return conn.execute(statement, (self.namespace, kind, key, counter[0], counter[1], data)).rowcount > 0
+
+            write(put)
+            conn.execute(
+                "UPDATE namespaces SET seq = ?, version = ? WHERE namespace = ?", (counter[0], counter[1], self.namespace)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+    def save_artifact(self, artifact_id: str, meta: dict):
+        self._queue.put(("artifact", artifact_id, json.dumps(meta)))
+
+    def save_batch(
+        self,
+        sections: List[Tuple[str, str, str]],
+        artifacts: List[Tuple[str, dict]],
+        allocate: Callable[[str], str],
+    ) -> Dict[str, str]:
+        """Commit new sections (key, label, content) and artifacts in one transaction, synchronously.
+
+        A section key that another session already stored is replaced by
+        allocate(label), and the batch's artifacts follow it. Returns
+        {requested key: stored key} for the sections that were re-keyed.
+        """
+        self.flush()
+        renamed: Dict[str, str] = {}
+
+        def write(put: Callable[[str, str, str, str], bool]):
+            renamed.clear()
+            for key, label, content in sections:
+                data = json.dumps({"label": label, "content": content})
+                stored_key = key
+                while not put(INSERT_NEW, "section", stored_key, data):
+                    stored_key = allocate(label)
+                if stored_key != key:
+                    renamed[key] = stored_key
+            for artifact_id, meta in artifacts:
+                if meta["section_key"] in renamed:
+                    meta = dict(meta, section_key=renamed[meta["section_key"]])
+                put(UPSERT, "artifact", artifact_id, json.dumps(meta))
+
+        conn = self._connect()
+        try:
+            self._commit(conn, write)
+        finally:
+            conn.close()
+        return renamed
+
+    def flush(self):
+        """Block until every queued write has been committed."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=10)
+
+    def _write_loop(self):
+        conn = self._connect()
+        try:
+            while True:
+                item = self._queue.get()
+                batch = [item]
+                # Gather whatever else arrives shortly after into one transaction
+                try:
+                    while item is not None and len(batch) < MAX_BATCH:
+                        item = self._queue.get(timeout=FLUSH_INTERVAL_SECONDS)
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+                rows = [entry for entry in batch if entry is not None]
+
+                def write(put: Callable[[str, str, str, str], bool]):
+                    for kind, key, data in rows:
+                        put(UPSERT, kind, key, data)
+
+                try:
+                    if rows:
+                        self._commit(conn, write)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+                if batch[-1] is None:
+                    return
+        finally:
+            conn.close()
+
+    # Reads
+    def section_labels(self) -> Dict[str, str]:
+        """Return {key: label} of the persisted sections, without loading anything else."""
+        self.flush()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT key, data FROM records WHERE namespace = ? AND kind = 'section' ORDER BY seq", (self.namespace,)
+            )
+            return {key: json.loads(data)["label"] for key, data in rows}
+        finally:
+            conn.close()
+
+    def artifact(self, artifact_id: str) -> Optional[dict]:
+        """Return one artifact's persisted metadata, e.g. to pick up an outcome recorded by another session's job."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT data FROM records WHERE namespace = ? AND kind = 'artifact' AND key = ?", (self.namespace, artifact_id)
+            ).fetchone()
+        finally:
+            conn.close()
+        return json.loads(row[0]) if row is not None else None
+
+    def snapshot(self, index_base: Optional[SearchIndex] = None) -> PersistedState:
+        """Return the namespace's records as shared by every session of this process.
+
+        index_base is the resume's own search index, which the snapshot's
+        search layers sit on.
+        """
+        self.flush()
+        with self._snapshot_lock:
+            current = self._snapshot
+            conn = self._connect()
+            try:
+                row = conn.execute("SELECT version FROM namespaces WHERE namespace = ?", (self.namespace,)).fetchone()
+                version = row[0] if row is not None else 0
+                if current is None or current.version != version:
+                    # Only the rows written since the current snapshot, in creation order
+                    rows = conn.execute(
+                        "SELECT kind, key, data, version FROM records WHERE namespace = ? AND version > ? ORDER BY seq",
+                        (self.namespace, current.version if current is not None else -1),
+                    ).fetchall()
+                    version = max([version] + [row[3] for row in rows])
+                    current = self._snapshot = self._apply(current, rows, version, index_base)
+            finally:
+                conn.close()
+            if self._layers[0].search_index.base is not index_base:
+                # The resume file was reloaded: restack the layers over its new index
+                self._restack(index_base)
+                current = self._snapshot = current._replace(search_index=self._layers[-1].search_index)
+            return current
+
+    def _apply(
+        self,
+        current: Optional[PersistedState],
+        rows: List[Tuple[str, str, str, int]],
+        version: int,
+        index_base: Optional[SearchIndex],
+    ) -> PersistedState:
+        """Return current with rows applied as a new layer; shared structures are never modified."""
+        if current is not None and not rows:
+            return current._replace(version=version)
+        below = self._layers[-1] if self._layers else None
+        sections: Dict[str, Tuple[str, str]] = dict(current.sections) if current is not None else {}
+        by_section: Dict[str, Tuple[str, ...]] = dict(current.artifacts_by_section) if current is not None else {}
+        unfinished = set(current.unfinished) if current is not None else set()
+        artifact_bytes = current.artifact_bytes if current is not None else 0
+        count = len(current.artifacts) if current is not None else 0
+        artifacts: Dict[str, dict] = {}
+        artifact_index = ArtifactIndex(below.artifact_index if below is not None else None)
+        index = SearchIndex(base=below.search_index if below is not None else index_base)
+        added: Dict[str, List[str]] = {}
+        texts = get_text_store()
+        for kind, key, data, _ in rows:
+            record = json.loads(data)
+            if kind == "section":
+                sections[key] = (record["label"], record["content"])
+                index.add(f"section:{key}", "section", key, record["label"], record["content"])
+            elif kind == "artifact":
+                previous = current.artifacts.get(key) if current is not None else None
+                if previous is None:
+                    # Indexed fields never change after an upload: only new artifacts are indexed
+                    artifact_index.add(key, record)
+                    added.setdefault(record["section_key"], []).append(key)
+                    count += 1
+                else:
+                    artifact_bytes -= previous["size"]
+                artifact_bytes += record["size"]
+                artifacts[key] = record
+                state = record.get("processing", {}).get("state", "done")
+                if state in ("queued", "running"):
+                    unfinished.add(key)
+                else:
+                    unfinished.discard(key)
+                text = texts.get(record["sha256"]) if state == "done" else ""
+                index.add(f"artifact:{key}", "artifact", key, record["name"], text, store_text=False)
+        for key, artifact_ids in added.items():
+            by_section[key] = by_section.get(key, ()) + tuple(artifact_ids)
+
+        self._layers.append(SnapshotLayer(artifacts, artifact_index, index))
+        while len(self._layers) > 1 and _layer_size(self._layers[-2]) <= 2 * _layer_size(self._layers[-1]):
+            upper = self._layers.pop()
+            lower = self._layers.pop()
+            self._layers.append(SnapshotLayer(
+                {**lower.artifacts, **upper.artifacts},
+                upper.artifact_index.merged_with_base(),
+                upper.search_index.merged_with_base(),
+            ))
+        top = self._layers[-1]
+        return PersistedState(
+            MappingProxyType(sections),
+            LayeredMapping([layer.artifacts for layer in self._layers], count),
+            MappingProxyType(by_section),
+            top.artifact_index,
+            artifact_bytes,
+            top.search_index,
+            frozenset(unfinished),
+            version,
+        )
+
+    def _restack(self, index_base: Optional[SearchIndex]):
+        # Layers share their postings with the previous stack: only the links change
+        base = index_base
+        for i, layer in enumerate(self._layers):
+            search_index = copy.copy(layer.search_index)
+            search_index.rebase(base)
+            self._layers[i] = layer._replace(search_index=search_index)
+            base = search_index
+
+
+def _layer_size(layer: SnapshotLayer) -> int:
+    return len(layer.search_index.docs)
+
+
+_state_store: Optional[StateStore] = None
+_state_store_lock = threading.Lock()
+
+
+def get_state_store() -> Optional[StateStore]:
+    """Return the process-wide state store, or None when persistence is disabled."""
+    global _state_store
+    path = os.environ.get("RESUME_DB_PATH")
+    if path is None:
+        path = os.path.join(os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "resume.sqlite3")
+    if not path:
+        return None
+    if _state_store is None:
+        with _state_store_lock:
+            if _state_store is None:
+                _state_store = StateStore(path, os.environ.get("RESUME_DB_NAMESPACE", "default"))
+    return _state_store
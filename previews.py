@@ -0,0 +1,203 @@
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+from artifact_store import SESSION_CACHE_BYTES, BlobCache, get_artifact_store
+
+# =============================
+# Artifact Preview Generation
+# =============================
+# Previews are produced once per content digest by a small worker pool and
+# written next to the blobs, so opening an artifact never decodes the original
+# on the Streamlit rerun path. Callers get None while a preview is still being
+# built and should render a placeholder. Previews held in memory are charged
+# to the session that last viewed them, up to its RESUME_SESSION_CACHE_MB share.
+#
+# Configuration (environment):
+#   RESUME_PREVIEW_DIR      preview directory (default <artifact dir>/previews)
+#   RESUME_PREVIEW_WORKERS  worker threads (default min(4, CPU count))
+
+THUMBNAIL_SIZE = (480, 480)
+PDF_RENDER_WIDTH = 480
+TEXT_SNIPPET_CHARS = 2000
+EXTRACT_TEXT_CHARS = 100_000
+TEXT_MIME_TYPES = ("application/json", "application/xml", "application/javascript", "image/svg+xml")
+
+# pdfium is not thread-safe; serialise every call into it
+_pdfium_lock = threading.Lock()
+
+
+class Preview(NamedTuple):
+    kind: str  # "image", "text" or "none"
+    data: bytes
+
+
+def preview_kind(mime: str) -> str:
+    if mime == "application/pdf" or (mime.startswith("image/") and mime != "image/svg+xml"):
+        return "image"
+    if mime.startswith("text/") or mime in TEXT_MIME_TYPES:
+        return "text"
+    return "none"
+
+
+def render_image_thumbnail(stream) -> bytes:
+    from PIL import Image
+
+    with Image.open(stream) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        return encode_thumbnail(image)
+
+
+def render_pdf_first_page(stream) -> bytes:
+    import pypdfium2 as pdfium
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(stream)
+        try:
+            page = pdf[0]
+            scale = PDF_RENDER_WIDTH / page.get_width()
+            image = page.render(scale=scale).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    return encode_thumbnail(image)
+
+
+def encode_thumbnail(image) -> bytes:
+    buffer = io.BytesIO()
+    if image.mode in ("RGBA", "LA", "P"):
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.convert("RGB").save(buffer, format="JPEG", quality=80, optimize=True)
+    return buffer.getvalue()
+
+
+def render_text_snippet(stream) -> bytes:
+    # Read a little extra so a multi-byte character is not cut in half
+    head = stream.read(TEXT_SNIPPET_CHARS * 4)
+    return head.decode("utf-8", errors="replace")[:TEXT_SNIPPET_CHARS].encode("utf-8")
+
+
+def extract_text(stream, mime: str, limit: int = EXTRACT_TEXT_CHARS) -> str:
+    """Return up to limit characters of searchable text from a payload."""
+    if mime == "application/pdf":
+        import pypdfium2 as pdfium
+
+        parts: List[str] = []
+        remaining = limit
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(stream)
+            try:
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    parts.append(textpage.get_text_range()[:remaining])
+                    textpage.close()
+                    page.close()
+                    remaining -= len(parts[-1])
+                    if remaining <= 0:
+                        break
+            finally:
+                pdf.close()
+        return "\n".join(parts)
+    if preview_kind(mime) == "text":
+        return stream.read(limit * 4).decode("utf-8", errors="replace")[:limit]
+    return ""
+
+
+class PreviewService:
+    """Generate and cache previews keyed by artifact content digest."""
+
+    def __init__(self, root: str, workers: int):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.cache = BlobCache(16 * 1024 * 1024, SESSION_CACHE_BYTES, name="preview")
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview")
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str, kind: str) -> str:
+        return os.path.join(self.root, f"{digest}.{kind}")
+
+    def _load(self, digest: str, kind: str, owner: Optional[str] = None) -> Optional[Preview]:
+        cache_key = f"{digest}.{kind}"
+        data = self.cache.get(cache_key, owner)
+        if data is None:
+            try:
+                with open(self._path(digest, kind), "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return None
+            self.cache.put(cache_key, data, owner)
+        return Preview(kind, data)
+
+    def submit(self, digest: str, mime: str) -> Optional[Future]:
+        """Queue preview generation unless it already exists or is in flight."""
+        kind = preview_kind(mime)
+        if kind == "none" or os.path.exists(self._path(digest, kind)):
+            return None
+        with self._lock:
+            future = self._pending.get(f"{digest}.{kind}")
+            if future is None:
+                future = self._executor.submit(self._generate, digest, mime, kind)
+                self._pending[f"{digest}.{kind}"] = future
+            return future
+
+    def generate(self, digest: str, mime: str):
+        """Build the preview in the calling thread unless it already exists."""
+        kind = preview_kind(mime)
+        if kind != "none" and not os.path.exists(self._path(digest, kind)):
+            self._generate(digest, mime, kind)
+
+    def get(self, digest: str, mime: str, owner: Optional[str] = None) -> Optional[Preview]:
+        """Return the preview (charged to owner), or None (scheduling it) while it is being generated."""
+        kind = preview_kind(mime)
+        if kind == "none":
+            return Preview("none", b"")
+        preview = self._load(digest, kind, owner)
+        if preview is None:
+            future = self.submit(digest, mime)
+            if future is not None and future.done():
+                preview = self._load(digest, kind, owner)
+        return preview
+
+    def _generate(self, digest: str, mime: str, kind: str):
+        try:
+            try:
+                with get_artifact_store().open(digest) as stream:
+                    if mime == "application/pdf":
+                        data = render_pdf_first_page(stream)
+                    elif kind == "image":
+                        data = render_image_thumbnail(stream)
+                    else:
+                        data = render_text_snippet(stream)
+            except Exception:
+                # Undecodable input or missing optional dependency: an empty
+                # preview is cached so the work is not retried on every rerun
+                data = b""
+            tmp_path = self._path(digest, kind) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(digest, kind))
+        finally:
+            with self._lock:
+                self._pending.pop(f"{digest}.{kind}", None)
+
+
+_service: Optional[PreviewService] = None
+_service_lock = threading.Lock()
+
+
+def get_preview_service() -> PreviewService:
+    """Return the process-wide preview service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                root = os.environ.get("RESUME_PREVIEW_DIR") or os.path.join(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "previews"
+                )
+                workers = int(os.environ.get("RESUME_PREVIEW_WORKERS", min(4, os.cpu_count() or 1)))
+                _service = PreviewService(root, workers)
+    return _service
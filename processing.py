@@ -0,0 +1,138 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Callable, Dict, NamedTuple, Optional
+
+from artifact_store import get_artifact_store
+from image_variants import get_variant_store, is_variant_source
+from metrics import inc, observe
+from previews import extract_text, get_preview_service
+from text_store import get_text_store
+
+# =============================
+# Post-Upload Processing Queue
+# =============================
+# Everything an upload needs after its bytes are stored (a malware scan
+# stand-in, text extraction, the preview thumbnail, responsive image
+# variants) runs in a bounded pool of worker processes instead of the
+# Streamlit rerun that received the file, so uploads return as soon as the
+# blob is hashed and written. Jobs are keyed by content digest, so the same
+# file uploaded twice is processed once. Results land on disk (text store,
+# previews, variants, the quarantine marker of a flagged blob) where every
+# process can read them; a done-callback of the job records its outcome in the
+# artifact's persisted metadata, whether or not the uploading session is still
+# open.
+#
+# Configuration (environment):
+#   RESUME_PROCESSING_WORKERS  worker processes (default: CPU count)
+
+SCAN_CHUNK_SIZE = 64 * 1024
+# The EICAR anti-virus test file: a harmless stand-in for a real scanner's signatures
+TEST_SIGNATURE = b"EICAR-STANDARD-ANTIVIRUS-TEST-FILE"
+
+
+class ProcessingResult(NamedTuple):
+    state: str  # "done" or "flagged"
+    text: str  # extracted searchable text
+    detail: str = ""
+
+
+def scan_blob(digest: str) -> bool:
+    """Return True if the blob contains a known test signature."""
+    tail = b""
+    with get_artifact_store().open(digest) as stream:
+        for chunk in iter(lambda: stream.read(SCAN_CHUNK_SIZE), b""):
+            # Keep a little of the previous chunk so a signature split across two is found
+            if TEST_SIGNATURE in tail + chunk:
+                return True
+            tail = chunk[-len(TEST_SIGNATURE):]
+    return False
+
+
+def process_blob(digest: str, mime: str) -> ProcessingResult:
+    """Run every post-upload step for a stored blob; used by the queue and bulk imports."""
+    if scan_blob(digest):
+        get_artifact_store().quarantine(digest)
+        return ProcessingResult("flagged", "", "matches a malware test signature")
+    store = get_artifact_store()
+    try:
+        with store.open(digest) as blob:
+            text = extract_text(blob, mime)
+    except Exception:
+        text = ""
+    get_text_store().put(digest, text)
+    get_preview_service().generate(digest, mime)
+    if is_variant_source(mime):
+        get_variant_store().ensure(digest, lambda: store.open(digest))
+    return ProcessingResult("done", text)
+
+
+class ProcessingQueue:
+    """Bounded process pool running process_blob at most once per digest at a time."""
+
+    def __init__(self, workers: int):
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, digest: str, mime: str) -> Future:
+        with self._lock:
+            future = self._pending.get(digest)
+            if future is not None:
+                return future
+            future = self._pending[digest] = self._submit(process_blob, digest, mime)
+        # Outside the lock: the callback runs at once if the job already finished
+        future.add_done_callback(lambda done, started=time.perf_counter(): self._finished(digest, done, started))
+        return future
+
+    def run(self, fn: Callable, *args) -> Future:
+        """Run another job (e.g. a bulk import's file) in the same bounded pool; fn must be picklable."""
+        with self._lock:
+            return self._submit(fn, *args)
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        try:
+            return self._executor_for_submit().submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory): start a fresh pool once
+            self._executor = None
+            return self._executor_for_submit().submit(fn, *args)
+
+    def _executor_for_submit(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs Streamlit's server threads is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"))
+        return self._executor
+
+    def _finished(self, digest: str, future: Future, started: float):
+        with self._lock:
+            self._pending.pop(digest, None)
+        state = "failed" if future.cancelled() or future.exception() is not None else future.result().state
+        inc("artifacts_processed", state=state)
+        observe("artifact_processing", time.perf_counter() - started)
+
+    def pending(self, digest: str) -> Optional[Future]:
+        """Return the job running for digest in this process, if any."""
+        with self._lock:
+            return self._pending.get(digest)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+_queue: Optional[ProcessingQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_processing_queue() -> ProcessingQueue:
+    """Return the process-wide post-upload processing queue."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ProcessingQueue(int(os.environ.get("RESUME_PROCESSING_WORKERS", os.cpu_count() or 1)))
+    return _queue
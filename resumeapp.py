@@ -1,173 +1,278 @@
-from PIL import Image
 import streamlit as st
-import os
-from typing import Dict, List
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+import functools
+import secrets
+import shutil
+import tempfile
+import time
+import weakref
+import zipfile
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 
-# =============================
-# App Configuration
-# =============================
-st.set_page_config(
-    page_title="Interactive Resume & Job Artefacts",
-    page_icon="🧭",
-    layout="wide",
-    initial_sidebar_state="expanded",
+from artifact_index import SORT_OPTIONS, ArtifactIndex
+from assets import artifact_download_url, export_download_url, variant_picture_html
+from artifact_store import MAX_UPLOAD_BYTES, ArtifactTooLarge, get_artifact_store
+from bulk_import import ImportPlan, ImportReport, ImportedFile, parse_section_rules, plan_import, process_source
+from content import (
+    OverlayDict,
+    OverlayList,
+    ResumeContent,
+    SectionKeyAllocator,
+    custom_section_content,
+    resume_content,
+    session_section_content,
+    session_section_labels,
+    session_section_order,
 )
+from exports import EXPORT_FORMATS, ExportArtifact, ExportSection, ExportSpec, get_export_service
+from image_variants import get_variant_store, is_variant_source
+from metrics import ENABLED as METRICS_ENABLED, inc, log_rerun, observe, set_gauge, timed, timer
+from persistence import get_state_store
+from previews import get_preview_service
+from processing import ProcessingResult, get_processing_queue
+from search import SearchDoc, SearchIndex
+from section_renderers import render_section_media
+from text_store import get_text_store
 
 # =============================
 # Helpers & Initialization
 # =============================
-def slugify(label: str) -> str:
-    """Create a safe key for sections based on label."""
-    return (
-        label.strip().lower()
-        .replace(" ", "_")
-        .replace("/", "_")
-        .replace("&", "and")
-        .replace("__", "_")
-    )
+ARTEFACTS_PAGE_SIZE = 25
+# Sidebar buttons rendered per navigation group at a time
+NAV_WINDOW_SIZE = 20
+# <picture> sizes hint for uploaded images on the artifact page
+ARTIFACT_IMAGE_SIZES = "(max-width: 960px) 100vw, 960px"
+EXPORT_FORMAT_LABELS = {"zip": "ZIP (resume.md + original files)", "pdf": "Single PDF"}
+# Seconds between progress refreshes while an export is being built
+EXPORT_POLL_SECONDS = 1.0
+# Seconds between checks of this session's post-upload processing jobs
+PROCESSING_POLL_SECONDS = 1.0
+# Fragment key the sidebar's navigation reruns on its own
+BODY_FRAGMENT = "body"
 
+@timed("init_state")
 def init_state():
+    # Resume sections from the resume file (or the built-ins), shared by every session
+    content = resume_content()
     if "section_order" not in st.session_state:
-        # Default resume sections (keys)
-        st.session_state.section_order = [
-            "summary",
-            "skills",
-            "competencies",
-            "experience",
-            "adaptability",
-            "services",
-        ]
+        # Resume section keys; shared read-only, appends stay per session
+        st.session_state.section_order = session_section_order(content)
     if "section_labels" not in st.session_state:
-        st.session_state.section_labels: Dict[str, str] = {
-            "summary": "Professional Summary",
-            "skills": "Skills",
-            "competencies": "Core Competencies",
-            "experience": "Professional Experience",
-            "adaptability": "Adaptability to Emerging Trends",
-            "services": "Business Arcitecture and Business Analysis Services",
-        }
+        st.session_state.section_labels = session_section_labels(content)
     if "section_content" not in st.session_state:
-        # Summary-only content for each section (derived from the user's resume)
-        st.session_state.section_content: Dict[str, str] = {
-            "summary": (
-                "- Seasoned **IT Business Analyst & Business Architect** with 15+ years of experience across finance, higher education, retail, and healthcare\n"
-                "- **TOGAF 9.1** & **ITIL V3** certified; skilled at aligning business and IT via "
-                "capability-based planning, process improvement, and Agile delivery."
-            ),
-            "skills": (
-                "- **Strategic & Leadership:** Enterprise Architecture (TOGAF), Business Capability Planning, Roadmaps, Business–IT Alignment, Team Leadership\n"
-                "- **Business Analysis:** Elicitation & Documentation (BRD, user stories, use cases), BPMN/CMMN/UML, Process Improvement, UAT Leadership, Solution Evaluation\n"
-                "- **Technical:** Identity & Access Management (IAM), SaaS/COTS configuration, SQL & data analysis, Systems Integration, ITSM (ITIL)\n"
-                "- **Tools & Methods:** Agile (Scrum/Kanban) & Waterfall, **Sparx EA**, **LeanIX**, **Jira**, **ServiceNow**, **Confluence**, **SharePoint**"
-            ),
-            "competencies": (
-                "- **Business Architecture & Analysis:** Capability/Information/Org mapping, strategic roadmaps, target operating models\n"
-                "- **Requirements & Design:** BABOK-aligned analysis, solution design definition, traceability\n"
-                "- **Solution Assessment & Validation:** Fit-gap, COTS/SaaS configuration, test strategy & UAT\n"
-                "- **Stakeholder Engagement:** Workshops/JAD, cross-functional facilitation, clear communication to executives\n"
-                "- **Agile Delivery & Improvement:** Iterative delivery, continuous improvement, change enablement"
-            ),
-            "experience": (
-                "**Highlights:**\n"
-                "- Led cloud **legal case management** implementation and UAT at **WorkSafeBC**.\n"
-                "- At **UBC**, built capability maps, value streams, and target-state roadmaps; defined last‑mile integrations for **Workday**.\n"
-                "- At **ICBC**, introduced **Business Capability Planning**; reduced document management TCO by ~55% (from $1.6M to $0.7M); delivered **Oracle IAM** integration.\n"
-                "- At **Safeway**, established **ITAM/SAM** practice; integrated HPAM, CMDB, Remedy, LDAP, Lawson; implemented Sun **IAM**, CA **ESP** scheduling, and Symantec Endpoint."
-            ),
-            "adaptability": (
-                "Continuously aligns BA practice with **emerging trends**: enterprise cloud, SaaS, "
-                "data-driven decisioning, automation, and architecture‑led transformation. "
-                "Active in IIBA/BizArch communities; rapidly adopts new tools & methods to drive measurable outcomes."
-            ),
-           "services": (
-                "**Business Architecture Services:**\n"
-                "- Developed comprehensive business architecture frameworks, including motivation models, governance models, and strategic roadmaps for organizations like Capilano University, BC Housing, and UBC, facilitating successful enterprise architecture practices and IT/business alignment.\n\n"
-                "**- Competency in:**\n"
-                "- Capability, Information & Organization Mapping\n"
-                "- Motivation, Benefits, As-Is and To-Be Target Operating Models\n"
-                "- Process Hierarchy Models\n"
-                "- Value Streams\n"
-                "- Strategic Roadmaps\n"
-                "- Business / IT Alignment maps\n"
-                "- Vision, Strategy, Objectives, and Measures Mapping\n"
-                "\n\n"
-                "**Business Analysis Services:**\n"
-                "- Led requirement gathering, analysis, and documentation efforts across various projects, including CRM upgrades at Vancity, case management solutions at WorksafeBC, and enterprise system implementations at UBC. Notable for crafting detailed business cases, process maps, and user stories to guide project execution. \n\n"
-                "**- Competency in:**\n"
-                "- Current state analysis and future state analysis documents \n"
-                "- Requirements Definition Document \n"
-                "- Epic, Feature and Stories\n"
-                "- Data Definition Requirements Document\n"
-                "- Gap Analysis Document \n"
-                "- Assistance with UAT Document\n" 
-                "- Business Process Maps\n"   
-                "- System deployment documents (i.e., deployment plan, service desk guide, etc.)\n" 
-                "- Progress status reports\n" 
-                "- Business cases\n" 
-                "- Resource Estimations\n" 
-            ),
-        }
-            
+        # Summary-only content for each section, with a copy-on-write overlay for edits
+        st.session_state.section_content = session_section_content(content)
+    if "section_keys" not in st.session_state:
+        st.session_state.section_keys = SectionKeyAllocator(st.session_state.section_labels)
     if "artefacts_by_section" not in st.session_state:
         # Mapping: section_key -> List[artifact_id]
         st.session_state.artefacts_by_section: Dict[str, List[str]] = {k: [] for k in st.session_state.section_order}
+    if "processing_jobs" not in st.session_state:
+        # artifact_id -> Future of its post-upload processing (see processing.py)
+        st.session_state.processing_jobs = {}
+        st.session_state.processing_total = 0
+    if "persisted_state_loaded" not in st.session_state:
+        # Custom sections and uploads saved by any session or worker process
+        restore_persisted_state(content)
+        st.session_state.persisted_state_loaded = True
     if "artifacts" not in st.session_state:
-        # Mapping: artifact_id -> dict with metadata and bytes
-        st.session_state.artifacts: Dict[str, dict] = {}
+        # Mapping: artifact_id -> metadata dict; payloads live in the artifact store
+        st.session_state.artifacts = OverlayDict({})
+    if "artifact_bytes" not in st.session_state:
+        # Running total of payload bytes referenced by this session's artifacts
+        st.session_state.artifact_bytes = sum(meta["size"] for meta in st.session_state.artifacts.values())
+    if "artifact_index" not in st.session_state:
+        # Secondary indexes (section, MIME type, created_at) for the Artefacts Manager
+        st.session_state.artifact_index = ArtifactIndex.build(st.session_state.artifacts)
+    if "search_index" not in st.session_state:
+        # Session layer over the shared index of default sections, updated incrementally
+        st.session_state.search_index = SearchIndex(
+            base=content.search_index,
+            text_loader=artifact_text_loader(st.session_state.artifacts, session_owner()),
+        )
+    if "content_version" not in st.session_state:
+        st.session_state.content_version = content.version
+    elif st.session_state.content_version != content.version:
+        apply_resume_content(content)
+    if "cache_owner" not in st.session_state:
+        # Freed together with the session's state when Streamlit discards the session
+        st.session_state.cache_owner = CacheOwner()
+        if session_owner() is not None:
+            weakref.finalize(st.session_state.cache_owner, release_session_caches, session_owner())
     if "current_page" not in st.session_state:
-        # "section", "artifact", or "artefacts_manager"
+        # "section", "artifact", "artefacts_manager" or "search"
         st.session_state.current_page = "section"
     if "current_section_key" not in st.session_state:
         st.session_state.current_section_key = "summary"
     if "current_artifact_id" not in st.session_state:
         st.session_state.current_artifact_id = None
 
+class CacheOwner:
+    """Placeholder in session state whose collection releases the session's cache charges."""
+
+def apply_resume_content(content: ResumeContent):
+    """Switch this session to reloaded resume sections, keeping its own sections and edits."""
+    st.session_state.section_order.rebase(content.order)
+    st.session_state.section_labels.rebase(content.labels)
+    st.session_state.section_content.rebase(content.content)
+    store = get_state_store()
+    # Persisted sections and artifacts stay layered between the resume and this session
+    st.session_state.search_index.rebase(
+        store.snapshot(content.search_index).search_index if store is not None else content.search_index
+    )
+    for key in content.order:
+        st.session_state.artefacts_by_section.setdefault(key, [])
+    st.session_state.content_version = content.version
+
+def is_resume_section(key: str) -> bool:
+    """True for sections of the resume itself, False for custom sections."""
+    return key in st.session_state.section_labels.base
+
+def session_owner() -> Optional[str]:
+    """Id the shared caches charge this session's bytes to."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+def release_session_caches(owner: str):
+    """Stop charging a closed session for shared cache entries; they stay cached for others."""
+    get_preview_service().cache.release(owner)
+    get_text_store().cache.release(owner)
+
+def artifact_text_loader(artifacts: Dict[str, dict], owner: Optional[str]) -> Callable[[SearchDoc], str]:
+    """Snippet text loader: extracted artifact text lives in the text store, not in the index."""
+    def load(doc: SearchDoc) -> str:
+        meta = artifacts.get(doc.ref)
+        return get_text_store().get(meta["sha256"], owner) if meta else ""
+    return load
+
+def restore_persisted_state(content: ResumeContent):
+    """Start this session from the persisted custom sections and artifacts, shared by the process."""
+    store = get_state_store()
+    if store is None:
+        return
+    with timer("restore_state"):
+        persisted = store.snapshot(content.search_index)
+    taken: List[str] = []
+    for key, (label, section_content) in persisted.sections.items():
+        if is_resume_section(key):
+            # The resume file gained this key after the custom section was stored: the resume's section wins
+            taken.append(key)
+            continue
+        if key not in st.session_state.section_labels:
+            st.session_state.section_order.append(key)
+        st.session_state.section_labels[key] = label
+        st.session_state.section_content[key] = section_content
+        st.session_state.artefacts_by_section.setdefault(key, [])
+    for key, artifact_ids in persisted.artifacts_by_section.items():
+        st.session_state.artefacts_by_section[key] = OverlayList(artifact_ids)
+    # Metadata, indexes and extracted text are shared; this session's changes overlay them
+    st.session_state.artifacts = OverlayDict(persisted.artifacts)
+    st.session_state.artifact_index = ArtifactIndex(base=persisted.artifact_index)
+    st.session_state.artifact_bytes = persisted.artifact_bytes
+    st.session_state.search_index = SearchIndex(
+        base=persisted.search_index,
+        text_loader=artifact_text_loader(st.session_state.artifacts, session_owner()),
+    )
+    for key in taken:
+        # Shadow the persisted section's document in the shared search layers
+        index_section(key)
+    queue = get_processing_queue()
+    for artifact_id in persisted.unfinished:
+        if queue.pending(persisted.artifacts[artifact_id]["sha256"]) is None:
+            # Interrupted by a restart; a job still running for another session
+            # persists its own outcome (see refresh_processing_state)
+            submit_processing(artifact_id)
+
+def index_section(key: str):
+    st.session_state.search_index.add(
+        f"section:{key}", "section", key,
+        st.session_state.section_labels.get(key, key.title()),
+        st.session_state.section_content.get(key, ""),
+    )
+
 def add_custom_section(label: str) -> str:
-    key = slugify(label)
-    # Ensure uniqueness
-    base = key
-    i = 2
-    while key in st.session_state.section_labels:
-        key = f"{base}_{i}"
-        i += 1
-    st.session_state.section_labels[key] = label
-    st.session_state.section_order.append(key)
-    st.session_state.section_content[key] = f"Custom section **{label}**. Upload and attach artefacts here from the Job Artefacts page."
-    st.session_state.artefacts_by_section[key] = []
-    return key
+    return add_custom_sections([label])[0]
 
+def add_custom_sections(labels: List[str]) -> List[str]:
+    """Create one custom section per label and return their keys."""
+    allocate = st.session_state.section_keys.allocate
+    # Unique key in constant time, however many sections share the label
+    sections = [(allocate(label), label, custom_section_content(label)) for label in labels]
+    store = get_state_store()
+    if store is not None:
+        # Committed before use, re-keying any section another session stored under the same key
+        renamed = store.save_batch(sections, [], allocate)
+        sections = [(renamed.get(key, key), label, content) for key, label, content in sections]
+    for key, label, content in sections:
+        st.session_state.section_labels[key] = label
+        st.session_state.section_order.append(key)
+        st.session_state.section_content[key] = content
+        st.session_state.artefacts_by_section[key] = []
+        index_section(key)
+    return [key for key, _, _ in sections]
+
+@timed("add_artifact")
 def add_artifact(file, assign_to: str, new_section_label: str = ""):
-    """Store the uploaded file in session state and link to a section."""
+    """Store the uploaded file in the artifact store and link it to a section."""
     if file is None:
         st.warning("Please upload a file first.")
         return None
 
     # Create artifact id
     timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S%f")
-    artifact_id = f"artifact_{timestamp}"
+    # The random part keeps ids unique across sessions sharing the state store
+    artifact_id = f"artifact_{timestamp}_{secrets.token_hex(4)}"
 
-    # Read bytes
-    data = file.read()
+    # Reject oversized uploads before touching their content
+    if getattr(file, "size", 0) > MAX_UPLOAD_BYTES:
+        st.error(f"{file.name} is larger than the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB upload limit.")
+        return None
+    if assign_to == "__NEW_SECTION__" and not new_section_label.strip():
+        st.error("Please provide a label for the new navigation section.")
+        return None
+
+    # Streamlit's UploadedFile is already held in memory (a BytesIO), so this
+    # cannot avoid buffering the upload once; copying it into the store in
+    # fixed-size chunks only avoids a second whole-file copy (file.getvalue())
+    file.seek(0)
+    try:
+        stored = get_artifact_store().ingest(file, mime=file.type)
+    except ArtifactTooLarge as exc:
+        st.error(f"{file.name}: {exc}")
+        return None
     name = file.name
-    mime = file.type or "application/octet-stream"
+    mime = file.type
+    if not mime or mime == "application/octet-stream":
+        mime = stored.mime
 
     # If creating a brand-new section
     target_section_key = assign_to
     if assign_to == "__NEW_SECTION__":
-        if not new_section_label.strip():
-            st.error("Please provide a label for the new navigation section.")
-            return None
         target_section_key = add_custom_section(new_section_label.strip())
 
     # Save artifact
     st.session_state.artifacts[artifact_id] = {
         "name": name,
         "mime": mime,
-        "bytes": data,
+        "sha256": stored.digest,
+        "size": stored.size,
         "section_key": target_section_key,
         "created_at": datetime.utcnow().isoformat() + "Z",
+        "processing": {"state": "queued"},
     }
+    st.session_state.artifact_index.add(artifact_id, st.session_state.artifacts[artifact_id])
+    store = get_state_store()
+    if store is not None:
+        # Queued and committed in a batch by the state store's writer thread
+        store.save_artifact(artifact_id, st.session_state.artifacts[artifact_id])
+    st.session_state.artifact_bytes += stored.size
+    inc("artifacts_added")
+    inc("artifact_bytes_added", stored.size)
+    set_gauge("artifact_hot_cache_bytes", get_artifact_store().cached_bytes())
+    # Findable by name right away; the extracted text is indexed once processed
+    st.session_state.search_index.add(f"artifact:{artifact_id}", "artifact", artifact_id, name, "")
+    submit_processing(artifact_id)
     # Link artifact to section
     if target_section_key not in st.session_state.artefacts_by_section:
         st.session_state.artefacts_by_section[target_section_key] = []
@@ -175,55 +280,514 @@ def add_artifact(file, assign_to: str, new_section_label: str = ""):
 
     return artifact_id
 
+def processing_state(meta: dict) -> str:
+    """"queued", "running", "done", "flagged" or "failed"; bulk imports are processed before they are added."""
+    return meta.get("processing", {}).get("state", "done")
+
+def is_flagged(meta: dict) -> bool:
+    """True if the upload scan flagged the artifact's blob; flagged files are never offered for download."""
+    return processing_state(meta) == "flagged" or get_artifact_store().is_quarantined(meta["sha256"])
+
+def processing_outcome(future) -> Tuple[dict, str]:
+    """Return (processing metadata, extracted text) of a finished job."""
+    try:
+        result: ProcessingResult = future.result()
+    except Exception as exc:
+        return {"state": "failed", "detail": str(exc) or type(exc).__name__}, ""
+    return {"state": result.state, "detail": result.detail}, result.text
+
+def persist_processing_outcome(artifact_id: str, meta: dict, future):
+    """Done-callback of a job: record its outcome even if the session that queued it has closed."""
+    store = get_state_store()
+    if store is not None:
+        store.save_artifact(artifact_id, dict(meta, processing=processing_outcome(future)[0]))
+
+def submit_processing(artifact_id: str):
+    """Queue the post-upload steps of an artifact; collect_processing_results() picks up the outcome."""
+    meta = st.session_state.artifacts[artifact_id]
+    if not st.session_state.processing_jobs:
+        st.session_state.processing_total = 0
+    future = get_processing_queue().submit(meta["sha256"], meta["mime"])
+    # Runs on the pool's thread, so it gets the metadata rather than session state
+    future.add_done_callback(functools.partial(persist_processing_outcome, artifact_id, dict(meta)))
+    st.session_state.processing_jobs[artifact_id] = future
+    st.session_state.processing_total += 1
+
+def collect_processing_results() -> int:
+    """Record finished jobs in their artifacts' metadata; return how many are still pending."""
+    jobs = st.session_state.processing_jobs
+    for artifact_id, future in list(jobs.items()):
+        meta = st.session_state.artifacts.get(artifact_id)
+        if meta is None:
+            del jobs[artifact_id]
+            continue
+        # Replaced rather than updated: restored metadata is shared with other sessions
+        if not future.done():
+            state = "running" if future.running() else "queued"
+            if processing_state(meta) != state:
+                st.session_state.artifacts[artifact_id] = dict(meta, processing={"state": state})
+            continue
+        del jobs[artifact_id]
+        # Persisted by the job's done-callback; this only updates the session's view
+        processing, text = processing_outcome(future)
+        meta = st.session_state.artifacts[artifact_id] = dict(meta, processing=processing)
+        if processing["state"] == "done":
+            st.session_state.search_index.add(
+                f"artifact:{artifact_id}", "artifact", artifact_id, meta["name"], text, store_text=False
+            )
+    return len(jobs)
+
+def refresh_processing_state(artifact_id: str) -> dict:
+    """Pick up the persisted outcome of an artifact another session's job was processing."""
+    meta = st.session_state.artifacts[artifact_id]
+    store = get_state_store()
+    if (
+        store is None
+        or processing_state(meta) not in ("queued", "running")
+        or artifact_id in st.session_state.processing_jobs
+        or get_processing_queue().pending(meta["sha256"]) is not None
+    ):
+        return meta
+    persisted = store.artifact(artifact_id)
+    if persisted is None or processing_state(persisted) in ("queued", "running"):
+        return meta
+    meta = st.session_state.artifacts[artifact_id] = dict(meta, processing=persisted["processing"])
+    if processing_state(meta) == "done":
+        st.session_state.search_index.add(
+            f"artifact:{artifact_id}", "artifact", artifact_id, meta["name"],
+            get_text_store().get(meta["sha256"], session_owner()), store_text=False,
+        )
+    return meta
+
+def apply_import_plan(plan: ImportPlan, files: List[ImportedFile]):
+    """Persist a planned bulk import in one transaction, then add it to this session."""
+    store = get_state_store()
+    if store is not None:
+        plan = plan.renamed(store.save_batch(plan.sections, plan.artifacts, st.session_state.section_keys.allocate))
+    for key, label, content in plan.sections:
+        st.session_state.section_labels[key] = label
+        st.session_state.section_order.append(key)
+        st.session_state.section_content[key] = content
+        st.session_state.artefacts_by_section[key] = []
+        index_section(key)
+    for (artifact_id, meta), imported in zip(plan.artifacts, files):
+        st.session_state.artifacts[artifact_id] = meta
+        st.session_state.artifact_index.add(artifact_id, meta)
+        st.session_state.artifact_bytes += meta["size"]
+        st.session_state.search_index.add(
+            f"artifact:{artifact_id}", "artifact", artifact_id, meta["name"], imported.text, store_text=False
+        )
+        st.session_state.artefacts_by_section.setdefault(meta["section_key"], []).append(artifact_id)
+    inc("artifacts_added", len(plan.artifacts))
+    inc("artifact_bytes_added", sum(meta["size"] for _, meta in plan.artifacts))
+
+def bulk_import(archive, rules_text: str, by_folder: bool, default_section: str) -> Optional[ImportReport]:
+    """Import every file of an uploaded ZIP archive, reporting progress as it goes."""
+    try:
+        rules = parse_section_rules([line for line in rules_text.splitlines() if line.strip()])
+    except ValueError as exc:
+        st.error(str(exc))
+        return None
+    with tempfile.NamedTemporaryFile(suffix=".zip") as tmp:
+        archive.seek(0)
+        shutil.copyfileobj(archive, tmp)
+        tmp.flush()
+        if not zipfile.is_zipfile(tmp.name):
+            st.error(f"{archive.name} is not a ZIP archive.")
+            return None
+        progress = st.progress(0.0, text="Processing files…")
+
+        def on_progress(done: int, total: int, done_bytes: int):
+            progress.progress(done / total, text=f"{done}/{total} files · {format_size(done_bytes)}")
+
+        report = process_source(tmp.name, on_progress=on_progress)
+    plan = plan_import(report.files, st.session_state.section_labels, rules, by_folder, default_section)
+    apply_import_plan(plan, report.files)
+    return report
+
+def export_spec(fmt: str) -> ExportSpec:
+    """Describe this session's resume and artefacts, in navigation order, for an export bundle."""
+    labels = st.session_state.section_labels
+    content = st.session_state.section_content
+    order = list(st.session_state.section_order)
+    return ExportSpec(
+        fmt,
+        tuple(ExportSection(key, labels.get(key, key.title()), content.get(key, "")) for key in order),
+        tuple(
+            ExportArtifact(key, meta["name"], meta["mime"], meta["sha256"])
+            for key in order
+            for meta in (st.session_state.artifacts[artifact_id] for artifact_id in st.session_state.artefacts_by_section.get(key, ()))
+            # Flagged uploads stay out of bundles, just as they have no download link
+            if not is_flagged(meta)
+        ),
+    )
+
 # =============================
 # Rendering Functions
 # =============================
-def render_sidebar():
-    st.sidebar.title("Resume Navigator")
-    st.sidebar.caption("Use the buttons below to open each section.")
-    # Navigation buttons for each section (in order)
+def nav_groups(query: str) -> List[Tuple[str, str, List[str]]]:
+    """Return (group id, title, section keys) for the sidebar, filtered by query."""
+    query = query.strip().lower()
+    cache_key = (query, len(st.session_state.section_order), st.session_state.content_version)
+    cached = st.session_state.get("nav_groups_cache")
+    if cached is not None and cached[0] == cache_key:
+        return cached[1]
+    labels = st.session_state.section_labels
+    resume_keys, custom_keys = [], []
     for key in st.session_state.section_order:
-        label = st.session_state.section_labels.get(key, key.title())
-        if st.sidebar.button(label, use_container_width=True, key=f"nav_{key}"):
-            st.session_state.current_page = "section"
-            st.session_state.current_section_key = key
+        if query and query not in labels.get(key, key).lower():
+            continue
+        (resume_keys if is_resume_section(key) else custom_keys).append(key)
+    groups = [("resume", "Resume", resume_keys)]
+    if custom_keys:
+        groups.append(("custom", "Custom sections", custom_keys))
+    st.session_state.nav_groups_cache = (cache_key, groups)
+    return groups
+
+def toggle_nav_group(group_id: str):
+    collapsed = st.session_state.setdefault("nav_collapsed", set())
+    collapsed.symmetric_difference_update({group_id})
+
+def shift_nav_window(group_id: str, delta: int):
+    offsets = st.session_state.setdefault("nav_offsets", {})
+    offsets[group_id] = max(offsets.get(group_id, 0) + delta, 0)
+
+def navigate(page: str, section_key: Optional[str] = None):
+    """Sidebar click handler: switch the page and rerun only the body fragment (the sidebar is unchanged)."""
+    st.session_state.current_page = page
+    if section_key is not None:
+        st.session_state.current_section_key = section_key
+    st.rerun(BODY_FRAGMENT)
+
+def reset_nav_windows():
+    st.session_state.nav_offsets = {}
+
+def render_nav_group(group_id: str, title: str, keys: List[str]):
+    """Render one collapsible group, building buttons only for the visible window."""
+    collapsed = group_id in st.session_state.get("nav_collapsed", set())
+    arrow = "▸" if collapsed else "▾"
+    st.button(
+        f"{arrow} {title} ({len(keys)})", key=f"nav_group_{group_id}",
+        on_click=toggle_nav_group, args=(group_id,),
+    )
+    if collapsed or not keys:
+        return
+
+    offsets = st.session_state.setdefault("nav_offsets", {})
+    start = min(offsets.get(group_id, 0), (len(keys) - 1) // NAV_WINDOW_SIZE * NAV_WINDOW_SIZE)
+    offsets[group_id] = start
+    labels = st.session_state.section_labels
+    for key in keys[start:start + NAV_WINDOW_SIZE]:
+        label = labels.get(key, key.title())
+        st.button(label, use_container_width=True, key=f"nav_{key}", on_click=navigate, args=("section", key))
+
+    if len(keys) > NAV_WINDOW_SIZE:
+        col_prev, col_range, col_next = st.columns([1, 2, 1])
+        col_prev.button(
+            "◀", key=f"nav_prev_{group_id}", disabled=start == 0,
+            on_click=shift_nav_window, args=(group_id, -NAV_WINDOW_SIZE),
+        )
+        col_range.caption(f"{start + 1}–{min(start + NAV_WINDOW_SIZE, len(keys))} of {len(keys)}")
+        col_next.button(
+            "▶", key=f"nav_next_{group_id}", disabled=start + NAV_WINDOW_SIZE >= len(keys),
+            on_click=shift_nav_window, args=(group_id, NAV_WINDOW_SIZE),
+        )
+
+@timed("render_sidebar")
+def render_sidebar():
+    st.title("Resume Navigator")
+    st.caption("Use the buttons below to open each section.")
+    st.text_input(
+        "Search", key="search_query", placeholder="Search sections and artefacts", on_change=open_search
+    )
+    st.text_input(
+        "Filter sections", key="nav_filter", placeholder="Type to filter…", on_change=reset_nav_windows
+    )
+    # Navigation buttons for each section (in order), grouped and windowed
+    for group_id, title, keys in nav_groups(st.session_state.get("nav_filter", "")):
+        render_nav_group(group_id, title, keys)
+    st.divider()
+    st.button(
+        "Job Artefacts", use_container_width=True, key="nav_artefacts_manager",
+        on_click=navigate, args=("artefacts_manager",),
+    )
             
-def show_section_page(section_key: str):
+def show_section_page(section_key: str, section_renderers: Optional[Dict[str, List[str]]] = None):
+    with timer("show_section_page", section=section_key if is_resume_section(section_key) else "custom"):
+        render_section_page(section_key, section_renderers)
+
+def render_section_page(section_key: str, section_renderers: Optional[Dict[str, List[str]]] = None):
     label = st.session_state.section_labels.get(section_key, section_key.title())
     st.title(label)
 
-       
-
-    # Show the infographic image on the Core Competencies page
-    if section_key == "experience":
-        img_path = "Infograph.jpg"   # uploaded image path
-        if os.path.exists(img_path):
-            st.markdown("## ")
-    
-            # Open image with PIL so we can resize it
-            image = Image.open(img_path)
-    
-            # Set desired width and height in pixels
-            desired_width = 500
-            desired_height = 400
-            image = image.resize((desired_width, desired_height))
-    
-            st.image(image, caption=" ")
-
+    # Configured media (infographic image/PDF) is loaded lazily by its renderer
+    render_section_media(section_key, "before", section_renderers)
 
     # Content
     content_md = st.session_state.section_content.get(section_key, "_No content for this section yet._")
-    st.markdown(content_md)
+    with timer("render_markdown"):
+        st.markdown(content_md)
+
+    render_section_media(section_key, "after", section_renderers)
+
+
+def format_size(num_bytes: int) -> str:
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+def show_artefacts_manager():
+    st.title("Job Artefacts")
+    labels = st.session_state.section_labels
+
+    # Upload form
+    with st.form("upload_artifact", clear_on_submit=True):
+        uploaded = st.file_uploader("Upload an artefact")
+        assign_to = st.selectbox(
+            "Attach to section",
+            st.session_state.section_order + ["__NEW_SECTION__"],
+            format_func=lambda k: "➕ New section…" if k == "__NEW_SECTION__" else labels.get(k, k.title()),
+        )
+        new_section_label = st.text_input("New section label (for ➕ New section…)")
+        if st.form_submit_button("Upload") and add_artifact(uploaded, assign_to, new_section_label):
+            st.success(f"Uploaded **{uploaded.name}**.")
+
+    with st.expander("Bulk import from a ZIP archive"):
+        with st.form("bulk_import", clear_on_submit=True):
+            archive = st.file_uploader("ZIP archive", type=["zip"])
+            by_folder = st.checkbox("Use each top-level folder as the section", value=True)
+            rules_text = st.text_area("Section rules, one GLOB=SECTION per line (checked first)", placeholder="*.pdf=experience")
+            default_section = st.selectbox(
+                "Section for everything else", list(st.session_state.section_order),
+                format_func=lambda k: labels.get(k, k.title()),
+            )
+            if st.form_submit_button("Import") and archive is not None:
+                report = bulk_import(archive, rules_text, by_folder, default_section)
+                if report is not None:
+                    st.success(
+                        f"Imported {len(report.files)} file(s), {format_size(report.total_bytes)} in {report.seconds:.1f} s "
+                        f"({report.files_per_second:.1f} files/s, {report.megabytes_per_second:.1f} MB/s)."
+                    )
+                    for path, error in report.failed:
+                        st.warning(f"{path}: {error}")
+
+    show_export_panel()
+
+    index = st.session_state.artifact_index
+    if not len(index):
+        st.info("No artefacts uploaded yet.")
+        return
+
+    # Filters and sorting, answered from the secondary indexes
+    col_section, col_mime, col_sort = st.columns(3)
+    section_counts = index.section_counts()
+    section_filter = col_section.selectbox(
+        "Section",
+        [None] + [k for k in st.session_state.section_order if k in section_counts],
+        format_func=lambda k: "All sections" if k is None else f"{labels.get(k, k.title())} ({section_counts[k]})",
+        key="am_section",
+    )
+    mime_counts = index.mime_counts()
+    mime_filter = col_mime.selectbox(
+        "Type",
+        [None] + sorted(mime_counts),
+        format_func=lambda m: "All types" if m is None else f"{m} ({mime_counts[m]})",
+        key="am_mime",
+    )
+    sort = col_sort.selectbox("Sort by", list(SORT_OPTIONS), format_func=SORT_OPTIONS.get, key="am_sort")
+
+    # Only the current page is fetched and rendered
+    page = st.session_state.get("am_page", 1)
+    total, page_ids = index.query(section_filter, mime_filter, sort, (page - 1) * ARTEFACTS_PAGE_SIZE, ARTEFACTS_PAGE_SIZE)
+    page_count = max(1, -(-total // ARTEFACTS_PAGE_SIZE))
+    if page > page_count:
+        page = st.session_state.am_page = page_count
+        total, page_ids = index.query(section_filter, mime_filter, sort, (page - 1) * ARTEFACTS_PAGE_SIZE, ARTEFACTS_PAGE_SIZE)
+
+    st.caption(f"{total} artefact(s)")
+    for artifact_id in page_ids:
+        meta = st.session_state.artifacts[artifact_id]
+        col_name, col_section, col_type, col_size, col_created, col_open = st.columns([4, 3, 2, 1, 2, 1])
+        col_name.markdown(f"**{meta['name']}**")
+        col_section.write(labels.get(meta["section_key"], meta["section_key"]))
+        col_type.write(meta["mime"])
+        col_size.write(format_size(meta["size"]))
+        col_created.write(meta["created_at"][:16].replace("T", " "))
+        col_open.button("Open", key=f"open_{artifact_id}", on_click=open_artifact, args=(artifact_id,))
+    st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="am_page")
+
+def show_export_panel():
+    with st.expander("Export resume and artefacts"):
+        fmt = st.radio("Format", list(EXPORT_FORMATS), format_func=EXPORT_FORMAT_LABELS.get, horizontal=True, key="export_format")
+        if st.button("Prepare export"):
+            # Built in the background; an unchanged resume is served from the cache
+            st.session_state.export_name = get_export_service().submit(export_spec(fmt))
+        name = st.session_state.get("export_name")
+        status = get_export_service().status(name) if name else None
+        if status is None:
+            return
+        if status.state == "pending":
+            show_export_progress(name)
+        elif status.state == "ready":
+            ext = name.rsplit(".", 1)[1]
+            path = get_export_service().path_for(name)
+            show_download(
+                st, f"Download {ext.upper()}", export_download_url(name, f"resume.{ext}"),
+                lambda: open(path, "rb"), f"resume.{ext}", EXPORT_FORMATS[ext],
+            )
+        else:
+            st.error(f"The export failed: {status.error}")
+
+@st.fragment(run_every=EXPORT_POLL_SECONDS)
+def show_export_progress(name: str):
+    status = get_export_service().status(name)
+    if status is None or status.state != "pending":
+        # Finished: rerun the page to swap the progress bar for the result
+        st.rerun()
+    st.progress(status.done / max(status.total, 1), text=f"Preparing export… {status.done}/{status.total}")
+
+@st.fragment(run_every=PROCESSING_POLL_SECONDS)
+def processing_fragment():
+    """Upload processing progress, polled on its own without blocking the page."""
+    pending = collect_processing_results()
+    if not pending:
+        # Finished: rerun the app so previews and search results reflect it
+        st.session_state.processing_shown = False
+        st.rerun()
+    total = st.session_state.processing_total
+    st.progress((total - pending) / total, text=f"Processing uploads… {total - pending}/{total}")
+
+def show_download(
+    container, label: str, url: Optional[str], open_stream: Callable[[], BinaryIO], file_name: str, mime: str
+):
+    """Link to a download streamed by the asset server (resumable via Range), never through session state.
+
+    Without the asset server (url is None) a download button reads the file
+    only when it is clicked.
+    """
+    if url is not None:
+        container.link_button(label, url, use_container_width=True)
+        return
+
+    def read() -> bytes:
+        with open_stream() as stream:
+            return stream.read()
+
+    container.download_button(label, read, file_name=file_name, mime=mime, on_click="ignore", use_container_width=True)
+
+def open_page(page: str):
+    st.session_state.current_page = page
+
+def open_artifact(artifact_id: str):
+    st.session_state.current_page = "artifact"
+    st.session_state.current_artifact_id = artifact_id
+
+def show_artifact_page(artifact_id: str):
+    meta = st.session_state.artifacts.get(artifact_id)
+    if meta is None:
+        st.session_state.current_page = "artefacts_manager"
+        show_artefacts_manager()
+        return
+    labels = st.session_state.section_labels
+    st.title(meta["name"])
+    try:
+        stored_size, codec = get_artifact_store().storage_info(meta["sha256"])
+    except KeyError:
+        stored_size, codec = meta["size"], "identity"
+    storage = f" · stored {format_size(stored_size)} ({codec}, {meta['size'] / stored_size:.1f}×)" if codec != "identity" and stored_size else ""
+    st.caption(
+        f"{meta['mime']} · {format_size(meta['size'])}{storage} · "
+        f"{labels.get(meta['section_key'], meta['section_key'])} · uploaded {meta['created_at'][:16].replace('T', ' ')}"
+    )
+    col_back, col_download = st.columns([3, 1])
+    col_back.button("← Back to Job Artefacts", on_click=open_page, args=("artefacts_manager",))
+    meta = refresh_processing_state(artifact_id)
+    if not is_flagged(meta):
+        digest = meta["sha256"]
+        show_download(
+            col_download, "Download", artifact_download_url(digest, meta["name"], meta["mime"]),
+            lambda: get_artifact_store().open(digest), meta["name"], meta["mime"],
+        )
+
+    state = processing_state(meta)
+    if state in ("queued", "running"):
+        st.info("Processing upload… the preview appears once it is done.")
+        return
+    if state == "flagged":
+        st.warning(f"This file was flagged by the upload scan ({meta['processing'].get('detail', '')}); no preview is shown.")
+        return
+    if state == "failed":
+        st.warning(f"Processing this upload failed: {meta['processing'].get('detail', '')}")
+
+    # Responsive variants once generated, else the preview thumbnail
+    variants = get_variant_store().get(meta["sha256"]) if is_variant_source(meta["mime"]) else None
+    picture = variant_picture_html(meta["sha256"], variants, meta["name"], ARTIFACT_IMAGE_SIZES) if variants else None
+    if picture is not None:
+        st.html(picture)
+        return
+    # Previews are generated once per content hash by a background pool
+    preview = get_preview_service().get(meta["sha256"], meta["mime"], session_owner())
+    if preview is None:
+        st.info("Generating preview…")
+        st.button("Refresh preview")
+    elif not preview.data:
+        st.info("No preview available for this file type.")
+    elif preview.kind == "image":
+        st.image(preview.data)
+    else:
+        st.code(preview.data.decode("utf-8"), language=None)
+
+def open_search():
+    navigate("search" if st.session_state.search_query.strip() else "section")
+
+def open_search_result(kind: str, ref: str):
+    if kind == "artifact":
+        open_artifact(ref)
+    else:
+        st.session_state.current_page = "section"
+        st.session_state.current_section_key = ref
+
+def show_search_results(query: str):
+    st.title("Search")
+    started = time.perf_counter()
+    results = [
+        result for result in st.session_state.search_index.search(query)
+        # The shared persisted layer may hold records written after this session started
+        if result.ref in (st.session_state.artifacts if result.kind == "artifact" else st.session_state.section_labels)
+    ]
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    st.caption(f"{len(results)} result(s) for “{query}” in {elapsed_ms:.1f} ms")
+    for i, result in enumerate(results):
+        with st.container(border=True):
+            icon = "📎" if result.kind == "artifact" else "📄"
+            st.button(f"{icon} {result.title}", key=f"search_hit_{i}", on_click=open_search_result, args=(result.kind, result.ref))
+            st.caption(result.snippet)
 
 
 # =============================
 # Main
 # =============================
-def main():
-    init_state()
+def session_cache_bytes() -> int:
+    """Bytes of the shared preview and text caches currently charged to this session."""
+    owner = session_owner()
+    if owner is None:
+        return 0
+    return get_preview_service().cache.owner_bytes(owner) + get_text_store().cache.owner_bytes(owner)
+
+@st.fragment
+def sidebar_fragment():
+    """Sidebar with its own rerun scope: filtering, paging and collapsing stay local."""
     render_sidebar()
+    st.session_state.rendered_section_count = len(st.session_state.section_order)
 
-    if st.session_state.current_page == "artefacts_manager":
+@st.fragment(key=BODY_FRAGMENT)
+def body_fragment(section_renderers: Optional[Dict[str, List[str]]] = None):
+    """Page body with its own rerun scope: in-page widgets never redraw the sidebar."""
+    if st.session_state.current_page == "search" and st.session_state.get("search_query", "").strip():
+        show_search_results(st.session_state.search_query)
+    elif st.session_state.current_page == "artefacts_manager":
         show_artefacts_manager()
     elif st.session_state.current_page == "artifact" and st.session_state.current_artifact_id:
         show_artifact_page(st.session_state.current_artifact_id)
@@ -231,7 +795,56 @@ def main():
         # Default to section page
         if st.session_state.current_section_key not in st.session_state.section_labels:
             st.session_state.current_section_key = "summary"
-        show_section_page(st.session_state.current_section_key)
+        show_section_page(st.session_state.current_section_key, section_renderers)
+    # A new section was created or an upload queued during a fragment rerun:
+    # redraw the sidebar too
+    if not st.session_state.get("full_run") and (
+        st.session_state.get("rendered_section_count") != len(st.session_state.section_order)
+        or (st.session_state.processing_jobs and not st.session_state.get("processing_shown"))
+    ):
+        st.rerun()
+
+def main(section_renderers: Optional[Dict[str, List[str]]] = None):
+    """Run the app; section_renderers maps section keys to renderer names (default: configured)."""
+    # App Configuration
+    st.set_page_config(
+        page_title="Interactive Resume & Job Artefacts",
+        page_icon="🧭",
+        layout="wide",
+        initial_sidebar_state="expanded",
+    )
+    started = time.perf_counter()
+    if METRICS_ENABLED:
+        # The asset server also exposes /metrics
+        from assets import get_asset_server
+        get_asset_server()
+    init_state()
+    # The page body is drawn first so a full run renders it before the sidebar
+    # fragment compares navigation state against it
+    st.session_state.full_run = True
+    try:
+        body_fragment(section_renderers)
+        with st.sidebar:
+            sidebar_fragment()
+            st.session_state.processing_shown = bool(st.session_state.processing_jobs)
+            if st.session_state.processing_shown:
+                processing_fragment()
+    finally:
+        # Also when the run stops early (st.rerun, st.stop), or the next
+        # fragment rerun would take itself for part of a full run
+        st.session_state.full_run = False
+
+    if METRICS_ENABLED:
+        elapsed = time.perf_counter() - started
+        observe("rerun", elapsed, page=st.session_state.current_page)
+        log_rerun(
+            page=st.session_state.current_page,
+            section=st.session_state.current_section_key,
+            duration_ms=round(elapsed * 1000, 3),
+            session_artifacts=len(st.session_state.artifacts),
+            session_artifact_bytes=st.session_state.artifact_bytes,
+            session_cache_bytes=session_cache_bytes(),
+        )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,218 @@
+import math
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Set
+
+# =============================
+# Full-Text Search Index
+# =============================
+# An in-memory inverted index over section labels/content and artifact names
+# and extracted text. Documents are added, replaced or removed one at a time
+# from add_custom_section/add_artifact, so the index is never rebuilt on a
+# rerun. Queries are ranked with BM25 and the last query word also matches
+# as a prefix, which makes the search box behave like type-ahead.
+#
+# A session index can be layered over a shared, read-only base index (the
+# default resume sections), so per-session memory only grows with the
+# documents that session adds or replaces. Bases can be layered themselves:
+# a reloaded resume file only indexes its changed sections over the last one.
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+TITLE_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+
+
+def tokenize(text: str) -> List[str]:
+    return [t.lower() for t in TOKEN_RE.findall(text)]
+
+
+class SearchDoc(NamedTuple):
+    kind: str  # "section" or "artifact"
+    ref: str  # section key or artifact id
+    title: str
+    text: Optional[str]  # None when held outside the index (see text_loader)
+    length: int
+
+
+class SearchResult(NamedTuple):
+    kind: str
+    ref: str
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchIndex:
+    """Incrementally maintained inverted index with BM25 ranking."""
+
+    def __init__(self, base: Optional["SearchIndex"] = None, text_loader: Optional[Callable[[SearchDoc], str]] = None):
+        self.base = base
+        # Fetches the text of documents added with store_text=False
+        self.text_loader = text_loader
+        self.docs: Dict[str, SearchDoc] = {}
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.vocabulary: List[str] = []  # sorted, for prefix matching
+        self.total_length = 0
+        # Base documents replaced or removed in this layer
+        self.shadowed: Set[str] = set()
+
+    def __len__(self) -> int:
+        if self.base is None:
+            return len(self.docs)
+        return len(self.docs) + len(self.base) - len(self.shadowed)
+
+    def _total_length(self) -> int:
+        if self.base is None:
+            return self.total_length
+        shadowed = sum(self.base._doc(doc_id).length for doc_id in self.shadowed)
+        return self.total_length + self.base._total_length() - shadowed
+
+    def __contains__(self, doc_id: str) -> bool:
+        if doc_id in self.docs:
+            return True
+        return self.base is not None and doc_id not in self.shadowed and doc_id in self.base
+
+    def rebase(self, base: "SearchIndex"):
+        """Layer this index over a replacement base (e.g. reloaded resume sections)."""
+        self.base = base
+        self.shadowed = {doc_id for doc_id in self.shadowed if doc_id in base}
+
+    def _doc(self, doc_id: str) -> SearchDoc:
+        doc = self.docs.get(doc_id)
+        return doc if doc is not None else self.base._doc(doc_id)
+
+    def _postings(self, term: str) -> Dict[str, int]:
+        if self.base is None:
+            return self.postings.get(term, {})
+        # One pass down the layers: each hides what the layers above shadowed
+        merged: Dict[str, int] = {}
+        hidden: Set[str] = set()
+        layer: Optional[SearchIndex] = self
+        while layer is not None:
+            for doc_id, tf in layer.postings.get(term, {}).items():
+                if doc_id not in hidden and doc_id not in merged:
+                    merged[doc_id] = tf
+            hidden |= layer.shadowed
+            layer = layer.base
+        return merged
+
+    def merged_with_base(self) -> "SearchIndex":
+        """Return one layer holding this layer and its base; neither is modified.
+
+        Works from the postings alone, so texts held outside the index are not
+        fetched again.
+        """
+        lower = self.base
+        index = SearchIndex(base=lower.base, text_loader=self.text_loader)
+        index.docs = {doc_id: doc for doc_id, doc in lower.docs.items() if doc_id not in self.shadowed}
+        index.docs.update(self.docs)
+        for term, posting in lower.postings.items():
+            kept = {doc_id: tf for doc_id, tf in posting.items() if doc_id not in self.shadowed}
+            if kept:
+                index.postings[term] = kept
+        for term, posting in self.postings.items():
+            index.postings.setdefault(term, {}).update(posting)
+        index.vocabulary = sorted(index.postings)
+        index.total_length = sum(doc.length for doc in index.docs.values())
+        # What this layer shadowed below its base stays shadowed
+        index.shadowed = lower.shadowed | {doc_id for doc_id in self.shadowed if doc_id not in lower.docs}
+        return index
+
+    def add(self, doc_id: str, kind: str, ref: str, title: str, text: str, store_text: bool = True):
+        """Index a document, replacing any previous version with the same id.
+
+        With store_text=False only the postings are kept; snippets and removal
+        fetch the text through text_loader.
+        """
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        if self.base is not None and doc_id in self.base:
+            self.shadowed.add(doc_id)
+        terms = Counter(tokenize(text))
+        for term in tokenize(title):
+            terms[term] += TITLE_WEIGHT
+        length = sum(terms.values())
+        self.docs[doc_id] = SearchDoc(kind, ref, title, text if store_text else None, length)
+        self.total_length += length
+        for term, tf in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                insort(self.vocabulary, term)
+            posting[doc_id] = tf
+
+    def remove(self, doc_id: str):
+        if self.base is not None and doc_id in self.base:
+            self.shadowed.add(doc_id)
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc.length
+        for term in set(tokenize(self._text(doc))) | set(tokenize(doc.title)):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+                i = bisect_left(self.vocabulary, term)
+                if i < len(self.vocabulary) and self.vocabulary[i] == term:
+                    del self.vocabulary[i]
+
+    def _text(self, doc: SearchDoc) -> str:
+        if doc.text is not None:
+            return doc.text
+        return self.text_loader(doc) if self.text_loader is not None else ""
+
+    def _expand_prefix(self, prefix: str, limit: int = 50) -> List[str]:
+        i = bisect_left(self.vocabulary, prefix)
+        terms = []
+        while i < len(self.vocabulary) and len(terms) < limit and self.vocabulary[i].startswith(prefix):
+            terms.append(self.vocabulary[i])
+            i += 1
+        if self.base is not None:
+            terms = sorted(set(terms).union(self.base._expand_prefix(prefix, limit)))[:limit]
+        return terms
+
+    def search(self, query: str, limit: int = 20) -> List[SearchResult]:
+        words = tokenize(query)
+        n_docs = len(self)
+        if not words or not n_docs:
+            return []
+        # Every word but the last must match exactly; the last is a prefix
+        query_terms = [[w] for w in words[:-1]] + [self._expand_prefix(words[-1]) or [words[-1]]]
+
+        avg_length = self._total_length() / n_docs
+        scores: Dict[str, float] = {}
+        for alternatives in query_terms:
+            for term in alternatives:
+                posting = self._postings(term)
+                if not posting:
+                    continue
+                idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+                for doc_id, tf in posting.items():
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc(doc_id).length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        results = []
+        for doc_id, score in ranked:
+            doc = self._doc(doc_id)
+            results.append(SearchResult(doc.kind, doc.ref, doc.title, make_snippet(self._text(doc), words), score))
+        return results
+
+
+def make_snippet(text: str, words: List[str]) -> str:
+    """Return a short excerpt of text around the first query word it contains."""
+    lowered = text.lower()
+    position: Optional[int] = None
+    for word in words:
+        found = lowered.find(word)
+        if found != -1 and (position is None or found < position):
+            position = found
+    start = max((position or 0) - SNIPPET_CHARS // 4, 0)
+    snippet = " ".join(text[start:start + SNIPPET_CHARS].replace("*", "").split())
+    return ("…" if start else "") + snippet + ("…" if start + SNIPPET_CHARS < len(text) else "")
@@ -0,0 +1,119 @@
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import streamlit as st
+
+# =============================
+# Section Renderer Registry
+# =============================
+# Extra per-section media (the infographic image or PDF) used to live in three
+# forked copies of the app. Renderers are now registered here by name and
+# attached to sections by configuration. Each renderer imports its heavy
+# dependencies (PIL, the asset server, PDF tooling) inside its body, so they
+# are only paid for the first time a section that uses them is rendered.
+#
+# Configuration (environment):
+#   RESUME_SECTION_RENDERERS  comma-separated section=renderer pairs, e.g.
+#                             "experience=infographic_image,competencies=infographic_pdf"
+#                             ("" attaches none; default DEFAULT_SECTION_RENDERERS)
+
+INFOGRAPHIC_IMAGE = "Infograph.jpg"
+INFOGRAPHIC_IMAGE_SIZE = (500, 400)
+INFOGRAPHIC_PDF = "Experience_Infographic.pdf"
+INFOGRAPHIC_PDF_HEIGHT = 820
+
+
+class SectionRenderer(NamedTuple):
+    placement: str  # "before" or "after" the section's markdown content
+    render: Callable[[str], None]
+
+
+RENDERERS: Dict[str, SectionRenderer] = {}
+
+DEFAULT_SECTION_RENDERERS: Dict[str, List[str]] = {
+    "experience": ["infographic_image"],
+}
+
+
+def section_renderer(name: str, placement: str = "before"):
+    """Register a function taking a section key under name."""
+    def register(render: Callable[[str], None]) -> Callable[[str], None]:
+        RENDERERS[name] = SectionRenderer(placement, render)
+        return render
+    return register
+
+
+def parse_section_renderers(spec: str) -> Dict[str, List[str]]:
+    """Parse "section=renderer,..." into {section: [renderer, ...]}."""
+    config: Dict[str, List[str]] = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        section_key, _, name = item.partition("=")
+        if name.strip() not in RENDERERS:
+            raise ValueError(f"Unknown section renderer {name.strip()!r} in RESUME_SECTION_RENDERERS")
+        config.setdefault(section_key.strip(), []).append(name.strip())
+    return config
+
+
+def configured_section_renderers() -> Dict[str, List[str]]:
+    spec = os.environ.get("RESUME_SECTION_RENDERERS")
+    return DEFAULT_SECTION_RENDERERS if spec is None else parse_section_renderers(spec)
+
+
+def render_section_media(section_key: str, placement: str, config: Optional[Dict[str, List[str]]] = None):
+    """Run the renderers configured for section_key at the given placement."""
+    if config is None:
+        config = configured_section_renderers()
+    for name in config.get(section_key, ()):
+        renderer = RENDERERS[name]
+        if renderer.placement == placement:
+            renderer.render(section_key)
+
+
+# =============================
+# Built-in Renderers
+# =============================
+@section_renderer("infographic_image", placement="before")
+def render_infographic_image(section_key: str):
+    from assets import load_resized_image, responsive_image_html
+
+    # WebP/JPEG variants generated once per file version; the browser fetches
+    # the smallest one that fits its viewport from the asset server
+    picture = responsive_image_html(INFOGRAPHIC_IMAGE, INFOGRAPHIC_IMAGE_SIZE, "Experience infographic")
+    if picture is not None:
+        st.markdown("## ")
+        st.html(picture)
+        return
+    # Without the asset server (or before variants exist) the image is sent
+    # inline: decoded, resized and encoded once per file version, shared across sessions
+    image_bytes = load_resized_image(INFOGRAPHIC_IMAGE, INFOGRAPHIC_IMAGE_SIZE)
+    if image_bytes is not None:
+        st.markdown("## ")
+        st.image(image_bytes, caption=" ")
+
+
+@section_renderer("infographic_pdf", placement="after")
+def render_infographic_pdf(section_key: str):
+    from assets import get_asset_server, load_data_uri
+    from pdf_pages import get_pdf_page_store, viewer_html
+
+    server = get_asset_server()
+    if server is None:
+        # No asset server: embed the whole PDF for the browser's own viewer
+        data_uri = load_data_uri(INFOGRAPHIC_PDF, "application/pdf")
+        viewer = (
+            f'<iframe src="{data_uri}" width="100%" height="{INFOGRAPHIC_PDF_HEIGHT - 20}" type="application/pdf"></iframe>'
+            if data_uri is not None else None
+        )
+    else:
+        # Pages are rasterized server-side at the viewer's zoom, one at a time as
+        # they scroll into view, instead of the browser parsing the whole PDF
+        info = get_pdf_page_store().register(INFOGRAPHIC_PDF)
+        viewer = viewer_html(info, server.pdf_pages_url(info.etag)) if info is not None else None
+    if viewer is not None:
+        st.markdown("### Experience Infographic")
+        st.components.v1.html(viewer, height=INFOGRAPHIC_PDF_HEIGHT, scrolling=True)
+    else:
+        st.info(
+            f"The infographic PDF was not found at `{INFOGRAPHIC_PDF}`."
+            " Please generate or place it there to display it here."
+        )
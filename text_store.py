@@ -0,0 +1,80 @@
+import os
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from artifact_store import SESSION_CACHE_BYTES, BlobCache
+from metrics import observe
+
+# =============================
+# Extracted Text Spill Store
+# =============================
+# Text extracted from artifacts (up to EXTRACT_TEXT_CHARS per file) is only
+# needed to build search postings and, later, result snippets. Instead of
+# living in every session's search index, it is written once per content
+# digest to disk and kept in a byte-bounded LRU with a per-session share.
+# Least-recently-viewed texts are dropped from memory when a budget is
+# exceeded and reloaded from disk when a snippet needs them.
+#
+# Configuration (environment):
+#   RESUME_TEXT_DIR       spill directory (default <artifact dir>/text)
+#   RESUME_TEXT_CACHE_MB  process-wide in-memory budget in MiB (default 32)
+#   RESUME_SESSION_CACHE_MB  per-session share (see artifact_store.py)
+
+
+class TextStore:
+    """Extracted text keyed by artifact content digest, spilled to disk."""
+
+    def __init__(self, root: str, cache_bytes: int, session_cache_bytes: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+        self.cache = BlobCache(cache_bytes, session_cache_bytes, name="text")
+
+    def _path(self, digest: str) -> str:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise KeyError(digest)
+        return os.path.join(self.root, digest[:2], f"{digest}.txt")
+
+    def put(self, digest: str, text: str, owner: Optional[str] = None):
+        data = text.encode("utf-8")
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self.cache.put(digest, data, owner)
+
+    def get(self, digest: str, owner: Optional[str] = None) -> str:
+        """Return the text of digest ("" if none was stored), reloading it from disk if evicted."""
+        data = self.cache.get(digest, owner)
+        if data is None:
+            started = time.perf_counter()
+            try:
+                with open(self._path(digest), "rb") as f:
+                    data = f.read()
+            except (FileNotFoundError, KeyError):
+                return ""
+            observe("cache_reload", time.perf_counter() - started, cache=self.cache.name)
+            self.cache.put(digest, data, owner)
+        return data.decode("utf-8")
+
+
+_text_store: Optional[TextStore] = None
+_text_store_lock = threading.Lock()
+
+
+def get_text_store() -> TextStore:
+    """Return the process-wide extracted text store."""
+    global _text_store
+    if _text_store is None:
+        with _text_store_lock:
+            if _text_store is None:
+                root = os.environ.get("RESUME_TEXT_DIR") or os.path.join(
+                    os.environ.get("RESUME_ARTIFACT_DIR", ".artifacts"), "text"
+                )
+                cache_bytes = int(os.environ.get("RESUME_TEXT_CACHE_MB", "32")) * 1024 * 1024
+                _text_store = TextStore(root, cache_bytes, SESSION_CACHE_BYTES)
+    return _text_store